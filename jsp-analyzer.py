@@ -11,15 +11,23 @@ import csv
 import re
 import sys
 import json
-import glob
+import shutil
 import argparse
+import threading
+import functools
+from itertools import groupby
+from operator import itemgetter
 import networkx as nx
 from pathlib import Path
 from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Set, Any, Optional, Tuple
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
 
 try:
     from bs4 import BeautifulSoup
@@ -35,19 +43,478 @@ try:
 except ImportError:
     HAS_XML = False
 
+try:
+    import lxml.html
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
 try:
     import javalang
     HAS_JAVALANG = True
 except Exception:
     HAS_JAVALANG = False
 
+try:
+    import hyperscan
+    HAS_HYPERSCAN = True
+except ImportError:
+    HAS_HYPERSCAN = False
+
+try:
+    import re2
+    # 同名の別パッケージ（fb-re2, pyre2 など）は Set を持たないため、google-re2 のときだけ使う
+    HAS_RE2 = hasattr(re2, 'Set')
+except ImportError:
+    HAS_RE2 = False
+
+try:
+    from scipy.sparse import csgraph
+    from scipy.optimize import minimize
+    from scipy.spatial import cKDTree
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Graphviz レイアウト（pydot / pygraphviz はいずれも dot コマンドを実行する）
+try:
+    import pydot
+    HAS_PYDOT = True
+except ImportError:
+    HAS_PYDOT = False
+
+try:
+    import pygraphviz
+    HAS_PYGRAPHVIZ = True
+except ImportError:
+    HAS_PYGRAPHVIZ = False
+
+HAS_GRAPHVIZ_DOT = shutil.which('dot') is not None
+
+
+# 抽出処理で使う正規表現はモジュール読み込み時に一度だけコンパイルする
+_RE_ATTR = re.compile(r"(\w+)\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s>]+))")
+_RE_QUOTED_ATTR = re.compile(r'(\w+)\s*=\s*["\']([^"\']+)["\']')
+
+_RE_INCLUDE_DIRECTIVE = re.compile(r'<%@\s*include\s+file\s*=\s*["\']([^"\']+)["\'][^%>]*%>')
+_RE_INCLUDE_ACTION = re.compile(r'<jsp:include\s+[^>]*page\s*=\s*["\']([^"\']+)["\'][^>]*>')
+_RE_C_IMPORT = re.compile(r'<c:import\s+[^>]*url\s*=\s*["\']([^"\']+)["\'][^>]*>')
+_RE_INCLUDE_DIRECTIVE_ATTRS = re.compile(r'<%@\s*include\s+([^%>]+)%>', re.IGNORECASE)
+_RE_INCLUDE_ACTION_ATTRS = re.compile(r'<jsp:include\s+([^>]+)>', re.IGNORECASE)
+_RE_C_IMPORT_ATTRS = re.compile(r'<c:import\s+([^>]+)>', re.IGNORECASE)
+
+_RE_JSP_COMMENT = re.compile(r'<%--.*?--%>', re.DOTALL)
+_RE_HTML_COMMENT = re.compile(r'<!--.*?-->', re.DOTALL)
+_RE_SCRIPT_BLOCK = re.compile(r'<script[^>]*>.*?</script>', re.DOTALL | re.IGNORECASE)
+# ダブルクォート/シングルクォートのリテラルを左から一度に走査する
+_RE_JAVA_STRING_LITERAL = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+_RE_JAVA_BLOCK_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+_RE_JAVA_LINE_COMMENT = re.compile(r'//.*?$', re.MULTILINE)
+
+_RE_SCRIPTLET = re.compile(r'<%(?!@|=|!)(.*?)%>', re.DOTALL)
+_RE_DECISION_KEYWORDS = tuple(
+    re.compile(kw, re.IGNORECASE)
+    for kw in (r'\bif\b', r'\bfor\b', r'\bwhile\b', r'\bswitch\b', r'\bcase\b', r'\bcatch\b', r'\belse\b')
+)
+
+
+def _brace_max_depth(code: str) -> int:
+    """波括弧の最大ネスト深さを NumPy でまとめて計算する（閉じ過ぎた場合は 0 で打ち止め）"""
+    b = np.frombuffer(code.encode('utf-8', 'ignore'), dtype=np.uint8)
+    if b.size == 0:
+        return 0
+    depths = np.cumsum((b == 0x7B).astype(np.int32) - (b == 0x7D).astype(np.int32))
+    # 0 で打ち止めする走査の深さは、累積和からそれまでの最小値（負の部分）を差し引いたものに等しい
+    floor = np.minimum.accumulate(np.minimum(depths, 0))
+    return int((depths - floor).max(initial=0))
+
+
+def _sparse_fr_layout(G, seed=42, maxiter=200) -> Dict[Any, Tuple[float, float]]:
+    """Fruchterman-Reingold のエネルギーを疎な隣接行列上で L-BFGS により最小化する配置（scipy が必要）
+
+    引力はエッジごとの d^3/(3k)、斥力は KD 木で求めた近傍ペア（距離 3k 以内）の -k^2 log(d/3k)。
+    全ペアの斥力を計算しないため、ノード数が多いグラフでも spring_layout より速く収束する。
+    """
+    nodes = list(G)
+    n = len(nodes)
+    if n == 0:
+        return {}
+    if n == 1:
+        return {nodes[0]: (0.0, 0.0)}
+
+    # 向きと重複を無視した無向エッジ（上三角）だけを引力の対象にする
+    adjacency = nx.to_scipy_sparse_array(G, nodelist=nodes, format='csr')
+    adjacency = (adjacency + adjacency.T).tocoo()
+    upper = adjacency.row < adjacency.col
+    rows, cols = adjacency.row[upper], adjacency.col[upper]
+
+    k = 1.0 / np.sqrt(n)
+    cutoff = 3.0 * k
+    eps = 1e-9
+
+    def scatter(i, j, g):
+        # ペアごとの勾配 g を i に加算、j から減算してノードごとに集計する
+        # （ペアが空のとき bincount は整数配列を返すため、float に揃えて後段の加減算を可能にする）
+        return np.stack([
+            np.bincount(i, g[:, 0], minlength=n) - np.bincount(j, g[:, 0], minlength=n),
+            np.bincount(i, g[:, 1], minlength=n) - np.bincount(j, g[:, 1], minlength=n),
+        ], axis=1).astype(float, copy=False)
+
+    def energy(x):
+        pos = x.reshape(n, 2)
+        delta = pos[rows] - pos[cols]
+        d = np.sqrt((delta * delta).sum(axis=1)) + eps
+        value = (d ** 3).sum() / (3.0 * k)
+        grad = scatter(rows, cols, (d / k)[:, None] * delta)
+
+        pairs = cKDTree(pos).query_pairs(cutoff, output_type='ndarray')
+        if len(pairs):
+            i, j = pairs[:, 0], pairs[:, 1]
+            delta = pos[i] - pos[j]
+            d2 = (delta * delta).sum(axis=1) + eps
+            value -= k * k * 0.5 * np.log(d2 / (cutoff * cutoff)).sum()
+            grad -= scatter(i, j, (k * k / d2)[:, None] * delta)
+        return value, grad.ravel()
+
+    x0 = np.random.default_rng(seed).random(n * 2)
+    result = minimize(energy, x0, jac=True, method='L-BFGS-B', options={'maxiter': maxiter})
+    pos = nx.rescale_layout(result.x.reshape(n, 2))
+    return {node: (float(p[0]), float(p[1])) for node, p in zip(nodes, pos)}
+
+
+@functools.lru_cache(maxsize=None)
+def _normalize_ref_path(path: str) -> str:
+    """参照先パスを正規化し、区切りを / に揃える（同じ参照先が多くのファイルから現れるためキャッシュ）"""
+    return os.path.normpath(path).replace('\\', '/')
+
+
+def _heuristic_scriptlet_metrics(clean_code: str) -> Tuple[int, int, int, int]:
+    """javalang を使わない複雑度ヒューリスティック (分岐数, 論理演算子数, 三項演算子数, ネストスコア)"""
+    decision_count = sum(len(kw.findall(clean_code)) for kw in _RE_DECISION_KEYWORDS)
+    logical_ops = clean_code.count('&&') + clean_code.count('||')
+    ternary_ops = clean_code.count('?')
+    nesting_score = int(_brace_max_depth(clean_code) / 2)
+    return decision_count, logical_ops, ternary_ops, nesting_score
+
+
+_AST_DECISION_NODES = frozenset(('IfStatement', 'ForStatement', 'WhileStatement', 'DoStatement', 'SwitchStatement', 'TryStatement'))
+_AST_TERNARY_NODES = frozenset(('TernaryExpression', 'ConditionalExpression'))
+# try/switch の本体は BlockStatement ではなく文のリストとして保持されるため、それ自体を一段のブロックとして扱う
+_AST_BLOCK_NODES = frozenset(('BlockStatement', 'Block', 'TryStatement', 'SwitchStatement'))
+
+
+def _walk_scriptlet_ast(node, depth, ctx):
+    """javalang の AST を再帰的に辿り、分岐・論理演算子・三項演算子を数えてブロックの最大深さを記録する"""
+    nodename = type(node).__name__
+    # 分岐やループ系ノードを発見したらカウント
+    if nodename in _AST_DECISION_NODES:
+        ctx['dec'] += 1
+    # 三項演算子をカウント
+    elif nodename in _AST_TERNARY_NODES:
+        ctx['ternary'] += 1
+    # BinaryOperation ノードの演算子が && または || の場合は論理演算子としてカウント
+    elif nodename == 'BinaryOperation':
+        if getattr(node, 'operator', None) in ('&&', '||'):
+            ctx['logical'] += 1
+    # ブロックに入るときだけ深さを一段深くする（兄弟ブロックは同じ深さになる）
+    if nodename in _AST_BLOCK_NODES:
+        depth += 1
+        if depth > ctx['max_depth']:
+            ctx['max_depth'] = depth
+
+    _walk_scriptlet_children(node.children, depth, ctx)
+
+
+def _walk_scriptlet_children(children, depth, ctx):
+    """子要素を辿る（javalang の walk_tree と同様に、入れ子のリスト/タプルの中まで降りる）"""
+    for child in children:
+        if isinstance(child, javalang.ast.Node):
+            _walk_scriptlet_ast(child, depth, ctx)
+        elif isinstance(child, (list, tuple)):
+            _walk_scriptlet_children(child, depth, ctx)
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_scriptlet_complexity(clean_code: str) -> Tuple[int, int, int, int]:
+    """スクリプトレットの複雑度の内訳 (分岐数, 論理演算子数, 三項演算子数, ネストスコア) を返す。
+    共通の定型スクリプトレットはファイルをまたいで何度も現れるため、結果をキャッシュする。
+    """
+    if not HAS_JAVALANG:
+        # javalang が利用できない場合は従来のヒューリスティックを使用
+        return _heuristic_scriptlet_metrics(clean_code)
+
+    try:
+        # javalang はコンパイルユニットを期待するため、必要に応じてダミークラス/メソッドでラップする
+        wrapped = f"class X {{ void m() {{ {clean_code} }} }}"
+        tree = javalang.parse.parse(wrapped)
+    except Exception:
+        # パースに失敗した場合は従来のヒューリスティックにフォールバック
+        return _heuristic_scriptlet_metrics(clean_code)
+
+    # AST を一度だけ辿り、分岐ノードの数とブロックの実際のネスト深さを求める
+    ctx = {'dec': 0, 'logical': 0, 'ternary': 0, 'max_depth': 0}
+    try:
+        _walk_scriptlet_ast(tree, 0, ctx)
+    except RecursionError:
+        return _heuristic_scriptlet_metrics(clean_code)
+
+    return ctx['dec'], ctx['logical'], ctx['ternary'], int(ctx['max_depth'] / 2)
+
+
+_RE_FORM = re.compile(r'<form\s+([^>]+)>(.*?)</form>', re.DOTALL | re.IGNORECASE)
+_RE_FORM_OPEN = re.compile(r'<form\b', re.IGNORECASE)
+
+
+def _count_tag_opens(lower_text: str, tag: str) -> int:
+    """小文字化済みテキスト中の '<tag' + 空白 の出現数を str.count で数える"""
+    opening = '<' + tag
+    return sum(lower_text.count(opening + ws) for ws in ' \t\n\r\f\v')
+
+
+# HTMLパターン解析: JSP要素の除去と、主要タグの開始タグ計数
+_RE_HTML_JSP_BLOCK = re.compile(r'<%.*?%>', re.DOTALL)
+_RE_HTML_EL = re.compile(r'\${[^}]+}')
+_RE_HTML_PREFIXED_TAG = re.compile(r'<[a-z]+:[^>]+/?>')
+_RE_HTML_COUNT = re.compile(r'<(table|form|div|ul|ol|h[1-6]|img|a)\b', re.IGNORECASE)
+_HTML_PATTERN_XPATHS = (
+    ('tables', 'count(//table)'),
+    ('forms', 'count(//form)'),
+    ('divs', 'count(//div)'),
+    ('lists', 'count(//ul|//ol)'),
+    ('headers', 'count(//h1|//h2|//h3|//h4|//h5|//h6)'),
+    ('images', 'count(//img)'),
+    ('links', 'count(//a)'),
+)
+
+
+_RE_CSS_CLASS = re.compile(r'class\s*=\s*["\']([^"\']+)["\']')
+_RE_JS_FUNCTION_DEF = re.compile(r'function\s+(\w+)\s*\(')
+# 単語の途中から照合し直すと長い識別子の連続で二乗の後戻りになるため、単語の先頭に限定する
+_RE_JS_FUNCTION_CALL = re.compile(r'(?<!\w)(\w+)\s*\(')
+# 関数呼び出しと同じ形になる JavaScript の予約語（呼び出しとして記録しない）
+_JS_KEYWORDS = frozenset((
+    'if', 'for', 'while', 'switch', 'catch', 'function', 'return', 'else', 'do', 'new', 'typeof', 'in', 'of'
+))
+
+# メトリクス計算で数える要素のパターン
+# 名前付きグループの選択で1回にまとめると、各パターンの先頭リテラルによる高速探索が効かず
+# 一致ごとの Python 側の処理も増えるため、個別の findall の方が数倍速い。
+# また個別に数えることで、コメント内のタグも HTML要素数に含まれる（従来どおり）。
+# 件数は len(findall) で数える。finditer で数えると一致ごとに Match オブジェクトを作るため
+# 部分文字列のリストを作る findall より遅い（subn は内容全体のコピーを作る）。
+# 件数だけを数えるため、読み込んだバイト列に対して直接適用する（1バイト単位の走査で速い）。
+# 対応エンコーディング（UTF-8 / Shift_JIS / EUC-JP / Latin-1）ではマルチバイト文字の
+# 後続バイトに '<' '>' '!' '%' '-' は現れず、'<' の直後は必ず文字の先頭になるため件数は変わらない。
+_RE_HTML_TAG_B = re.compile(rb'<[a-zA-Z][^>]*>')
+_RE_SCRIPT_OPEN_B = re.compile(rb'<script[^>]*>')
+_RE_STYLE_OPEN_B = re.compile(rb'<style[^>]*>')
+_RE_HTML_COMMENT_B = re.compile(rb'<!--.*?-->', re.DOTALL)
+_RE_JSP_COMMENT_B = re.compile(rb'<%--.*?--%>', re.DOTALL)
+
+# Javaパターン解析用（制御構文の語と DB クラス名は重なり得ないため1つのパターンで数える。
+# 変数宣言は 'ResultSet rs' の 'Set rs' のように DB クラス名と重なって数えるため別パターンとする）
+_RE_JAVA_KEYWORD = re.compile(r'\b(for|while|do|if|switch)\b|(Connection|Statement|ResultSet)\b')
+_JAVA_KEYWORD_CATEGORIES = {
+    'for': 'loop_patterns', 'while': 'loop_patterns', 'do': 'loop_patterns',
+    'if': 'condition_patterns', 'switch': 'condition_patterns',
+    'Connection': 'db_patterns', 'Statement': 'db_patterns', 'ResultSet': 'db_patterns',
+}
+_RE_JAVA_VAR_DECL = re.compile(r'(?:int|String|boolean|long|double|float|List|Map|Set)\s+\w+')
+
+# セキュリティ問題の検出パターン
+# lastgroup で種別を判定する1本の選択にまとめると、先頭リテラルによる高速探索が効かず
+# 十数倍遅くなる。また一致位置の順に並ぶため、パターンごとの報告順も変わってしまう。
+# DB操作パターンと同じく、照合に必要なキーワードと組にして _find_literals で事前に判定する。
+_SQLI_PATTERNS = (
+    ('Statement.execute(', re.compile(r'Statement\.execute\([^)]*\+')),
+    ('executeQuery(', re.compile(r'executeQuery\([^)]*\+')),
+    ('executeUpdate(', re.compile(r'executeUpdate\([^)]*\+')),
+)
+_XSS_PATTERNS = (
+    ('request.getParameter', re.compile(r'<%=\s*request\.getParameter\(["\'][^"\']*["\']')),
+    ('request.getParameter', re.compile(r'out\.print\(\s*request\.getParameter')),
+)
+
+# 単一パス走査の対象となる要素のパターン
+_RE_DIRECTIVE = re.compile(r'<%@\s*(page|include|taglib|tag|attribute|variable)\s+([^%>]+)%>')
+_RE_EXPRESSION = re.compile(r'<%=(.*?)%>', re.DOTALL)
+_RE_DECLARATION = re.compile(r'<%!(.*?)%>', re.DOTALL)
+_RE_EL_STANDARD = re.compile(r'\$\{([^}]+)\}')
+_RE_EL_DEFERRED = re.compile(r'#\{([^}]+)\}')
+_RE_PREFIXED_TAG = re.compile(r'<([a-zA-Z0-9_]+):(\w+)')
+_RE_JSTL_FN = re.compile(r'fn:(\w+)\(')
+_RE_SESSION_CALL = re.compile(
+    r'session\.(?:(getAttribute|removeAttribute)\(["\'](\w+)["\']\)|(setAttribute)\(["\'](\w+)["\'])')
+_RE_REQUEST_CALL = re.compile(
+    r'request\.(?:(getParameter|getAttribute)\(["\'](\w+)["\']\)|(setAttribute)\(["\'](\w+)["\'])')
+_RE_RESPONSE_CALL = re.compile(r'response\.(sendRedirect|setContentType)\(["\']([^"\']+)["\']\)')
+# EL 式の一種なので個別には走査せず、EL 式のハンドラ内で判定する
+_RE_SESSION_SCOPE_EL = re.compile(r'\$\{sessionScope\.(\w+)\}')
+_RE_PARAM_EL = re.compile(r'\$\{param\.(\w+)\}')
+
+# (種別, パターン, DFA 前段フィルタ用アンカー, 一致に必ず含まれるリテラル)。
+# マッチごとに UnifiedJSPAnalyzer._handle_<種別> が呼ばれる。
+# 同系統のパターンは1本にまとめ、走査回数を種別数に抑えている。
+# アンカーはその種別のマッチが必ず先頭に持つ部分（正規表現）で、hyperscan / re2 の事前フィルタに使う
+# prefix:tag の ':' はほぼ全ファイルに現れるため、リテラルによる省略の対象外とする
+_SCAN_KINDS = (
+    ('directive', _RE_DIRECTIVE, r'<%@', '<%@'),
+    ('expression', _RE_EXPRESSION, r'<%=', '<%='),
+    ('declaration', _RE_DECLARATION, r'<%!', '<%!'),
+    ('el', _RE_EL_STANDARD, r'\$\{', '${'),
+    ('deferred_el', _RE_EL_DEFERRED, r'#\{', '#{'),
+    ('prefixed_tag', _RE_PREFIXED_TAG, r'<[a-zA-Z0-9_]+:', None),
+    ('jstl_fn', _RE_JSTL_FN, r'fn:', 'fn:'),
+    ('session', _RE_SESSION_CALL, r'session\.', 'session.'),
+    ('request', _RE_REQUEST_CALL, r'request\.', 'request.'),
+    ('response', _RE_RESPONSE_CALL, r'response\.', 'response.'),
+)
+
+
+def _build_scan_prefilter():
+    """全種別のアンカーを DFA エンジン（hyperscan / re2）で1回だけ照合し、
+    ファイル中に現れる種別のインデックス集合を返す関数を作る。
+    どちらも利用できない場合は None を返し、リテラルの in 判定で代用する。"""
+    anchors = [anchor for _, _, anchor, _ in _SCAN_KINDS]
+
+    if HAS_HYPERSCAN:
+        database = hyperscan.Database()
+        database.compile(
+            expressions=[anchor.encode('ascii') for anchor in anchors],
+            ids=list(range(len(anchors))),
+            elements=len(anchors),
+            flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(anchors)
+        )
+
+        def present_kinds(content):
+            found = set()
+            database.scan(content.encode('utf-8'),
+                          match_event_handler=lambda kind_id, start, end, flags, context: found.add(kind_id))
+            return found
+        return present_kinds
+
+    if HAS_RE2:
+        try:
+            anchor_set = re2.Set.SearchSet()
+            for anchor in anchors:
+                anchor_set.Add(anchor)
+            anchor_set.Compile()
+        except Exception:
+            # API の異なる re2 バインディングではリテラルの in 判定に戻す
+            return None
+
+        def present_kinds(content):
+            # 1つも一致しない場合 Match() は None を返す
+            return set(anchor_set.Match(content) or ())
+        return present_kinds
+
+    return None
+
+
+_present_scan_kinds = _build_scan_prefilter()
+
+
+# DB操作パターン（一致に必ず含まれるリテラル, パターン）
+_DB_CONNECTION_PATTERNS = (
+    ('Connection', re.compile(r'Connection\s+\w+\s*=')),
+    ('DriverManager.getConnection', re.compile(r'DriverManager\.getConnection')),
+    ('DataSource', re.compile(r'DataSource\s+\w+\s*=')),
+)
+
+_DB_SQL_PATTERNS = (
+    ('executeQuery(', re.compile(r'executeQuery\(["\']([^"\']+)["\']\)')),
+    ('executeUpdate(', re.compile(r'executeUpdate\(["\']([^"\']+)["\']\)')),
+    ('prepareStatement(', re.compile(r'prepareStatement\(["\']([^"\']+)["\']\)')),
+)
+
+# ファイルごとに出現の有無を一度だけ調べるキーワード
+_SCAN_LITERALS = tuple(dict.fromkeys(
+    [literal for _, _, _, literal in _SCAN_KINDS if literal] +
+    [literal for literal, _ in _DB_CONNECTION_PATTERNS + _DB_SQL_PATTERNS] +
+    [literal for literal, _ in _SQLI_PATTERNS + _XSS_PATTERNS]
+))
+
+
+def _find_literals(content: str) -> Set[str]:
+    """ファイル中に現れる _SCAN_LITERALS の集合を返す（抽出処理の間で共有する）。
+    str の in 判定は C 実装の部分文字列探索で、出現ごとに Python オブジェクトを作る
+    Aho-Corasick の iter() よりも、この程度のキーワード数では大幅に速い。"""
+    return {literal for literal in _SCAN_LITERALS if literal in content}
+
+
+# レポートはスレッドで並行に生成されるため、進捗メッセージは行単位でまとめて出力する
+_PRINT_LOCK = threading.Lock()
+
+
+def _print_line(message: str) -> None:
+    """1行のメッセージを他スレッドの出力と混ざらないように表示する"""
+    with _PRINT_LOCK:
+        print(message)
+
+
+# include グラフで共通部（header/footer/menu/common）とみなすパス（'/common/' は 'common' に含まれる）
+_RE_COMMON_INCLUDE = re.compile(r'header|footer|menu|common', re.IGNORECASE)
+
 
 class UnifiedJSPAnalyzer:
     """統合版JSPファイル解析クラス"""
+
+    # analyze_file がファイル単位で書き込む属性（並列解析時にワーカーの結果をこの単位でマージする）
+    _PER_FILE_ATTRS = (
+        'jsp_files', 'directives', 'includes', 'tag_libraries', 'scriptlets', 'expressions',
+        'declarations', 'actions', 'el_expressions', 'jstl_usage', 'custom_tags', 'forms',
+        'session_usage', 'request_usage', 'response_usage', 'db_operations', 'css_classes',
+        'js_function_defs', 'js_function_calls', 'metrics', 'security_issues', 'issues',
+        'html_patterns', 'java_patterns'
+    )
+    # 解析対象の拡張子と、走査しないビルド出力ディレクトリ
+    _JSP_EXTENSIONS = ('.jsp', '.jspf', '.tag', '.tagx')
+    _EXCLUDED_DIRS = frozenset(('build', 'target', 'dist'))
+    # ファイル読み込み時に順に試すエンコーディング
+    _ENCODINGS = ('utf-8', 'shift-jis', 'euc-jp', 'iso-2022-jp', 'latin-1')
+    # これ未満のファイル数ではプロセス起動コストの方が大きいため逐次解析する
+    _PARALLEL_MIN_FILES = 32
+    # レポート出力時のファイルバッファサイズ（行ごとの小さな write をまとめて OS に渡す）
+    _REPORT_BUFFER_SIZE = 1 << 20
+    # include グラフでノードラベルを描画するノード数の上限
+    _GRAPH_LABEL_NODE_LIMIT = 500
+    # include グラフで矢印付きのエッジ（自己ループを含む）を描画するノード数の上限
+    # （エッジ1本につき1アーティストになるため、超える場合は矢印なしの LineCollection 1つで描く）
+    _GRAPH_ARROW_NODE_LIMIT = 500
+    # include グラフで tight_layout（全アーティストの範囲計算）を行うノード数の上限と、保存時の解像度
+    _GRAPH_TIGHT_LAYOUT_NODE_LIMIT = 200
+    _GRAPH_DPI = 80
+
+    # (種別, コンパイル済みパターン) の組。呼び出しごとに辞書を作り直さないようクラス属性として保持する
+    _ACTION_PATTERNS = (
+        ('useBean', re.compile(r'<jsp:useBean\s+([^/>]+)(?:/?>)')),
+        ('setProperty', re.compile(r'<jsp:setProperty\s+([^/>]+)(?:/?>)')),
+        ('getProperty', re.compile(r'<jsp:getProperty\s+([^/>]+)(?:/?>)')),
+        ('forward', re.compile(r'<jsp:forward\s+([^/>]+)(?:/?>)')),
+        ('param', re.compile(r'<jsp:param\s+([^/>]+)(?:/?>)')),
+    )
+
+    # JSTL 標準タグのプレフィックスとライブラリ名
+    _JSTL_TAG_LIBRARIES = {'c': 'core', 'fmt': 'fmt', 'sql': 'sql', 'x': 'xml'}
+    # カスタムタグとして扱わないプレフィックス
+    _NON_CUSTOM_TAG_PREFIXES = ('c', 'fmt', 'sql', 'x', 'fn', 'jsp')
+
+    # 暗黙オブジェクトのメソッド名と操作種別
+    _SESSION_OPERATIONS = {'getAttribute': 'get', 'setAttribute': 'set', 'removeAttribute': 'remove'}
+    _REQUEST_OPERATIONS = {'getParameter': 'parameter', 'getAttribute': 'get', 'setAttribute': 'set'}
+    _RESPONSE_OPERATIONS = {'sendRedirect': 'redirect', 'setContentType': 'content_type'}
     
-    def __init__(self, project_dir, verbose=False):
+    def __init__(self, project_dir, verbose=False, jobs=None, deep_html=False):
         self.project_dir = project_dir
         self.verbose = verbose
+        self.deep_html = deep_html  # True の場合 HTMLパターンを BeautifulSoup で解析
+        self.jobs = jobs or os.cpu_count() or 1  # ファイル解析の並列プロセス数
         
         # ファイル情報
         self.jsp_files = {}  # JSPファイルの基本情報
@@ -70,7 +537,8 @@ class UnifiedJSPAnalyzer:
         self.db_operations = defaultdict(list)  # DB操作
         self.dependencies = defaultdict(list)  # 依存関係
         self.css_classes = defaultdict(set)  # CSSクラス
-        self.js_functions = defaultdict(set)  # JavaScript関数
+        self.js_function_defs = defaultdict(set)  # JavaScript関数定義
+        self.js_function_calls = defaultdict(set)  # JavaScript関数呼び出し
         
         # メトリクス
         self.metrics = {}  # 各ファイルのメトリクス
@@ -84,41 +552,91 @@ class UnifiedJSPAnalyzer:
         
         # 問題検出
         self.issues = defaultdict(list)  # 検出された問題
+
+        # 参照先解決用の索引（build_dependency_graph で構築）
+        self._norm_paths = {}  # file_id -> 区切りを / に揃えた相対パス
+        self._path_index = {}  # 正規化した相対パス -> file_id
+        self._basename_index = defaultdict(list)  # basename -> [file_id, ...]（走査順）
+        self._suffix_index = {}  # ディレクトリ境界で切ったパスの末尾部分 -> 最初の file_id
+        self._webinf_tags_index = {}  # WEB-INF/tags 配下の basename -> 最初の file_id
+        self._tag_file_cache = {}  # tagname -> 解決結果
+        self._include_resolution_cache = {}  # (呼び出し元ディレクトリ, 参照先) -> 解決結果
+        self._file_stats = {}  # scan_files で取得したパス -> os.stat_result
+
+        # 解析中ファイルの種別列（メトリクス集計用、analyze_file ごとに作り直す）
+        self._type_columns = defaultdict(list)
+
+        # レポート共通のプロジェクト集計値（_compute_summary で作成）
+        self._summary = None
+        # 参照先 file_id -> 呼び出し元 file_id の集合（_get_include_map で作成）
+        self._include_map = None
+        # file_id -> 表示用の相対パス（_get_path_of で作成）
+        self._path_of = None
         
         # 依存関係グラフ
         self.dependency_graph = nx.DiGraph()
 
     def log(self, message):
-        """ログ出力"""
+        """ログ出力（レポート生成スレッドの出力と行単位で混ざらないように表示する）"""
         if self.verbose:
-            print(message)
+            _print_line(message)
 
     def scan_files(self):
-        """JSPファイルをスキャン"""
-        patterns = [
-            os.path.join(self.project_dir, '**', '*.jsp'),
-            os.path.join(self.project_dir, '**', '*.jspf'),
-            os.path.join(self.project_dir, '**', '*.tag'),
-            os.path.join(self.project_dir, '**', '*.tagx')
-        ]
-        
-        all_files = []
-        for pattern in patterns:
-            all_files.extend(glob.glob(pattern, recursive=True))
-        
-        # build、target、distディレクトリを除外（WEB-INF/tagsは含める）
-        filtered_files = []
-        for f in all_files:
-            exclude = False
-            for exclude_dir in ['build', 'target', 'dist']:
-                if os.sep + exclude_dir + os.sep in f:
-                    if 'WEB-INF' not in f:  # WEB-INF配下は除外しない
-                        exclude = True
+        """JSPファイルをスキャン
+
+        従来の glob('**/*.jsp') などを拡張子ごとに4回行った結果と同じ順序（拡張子ごとにまとめ、
+        各拡張子の中はディレクトリの深さ優先・行きがけ順）で返す。各ディレクトリの中身は名前順に
+        並べるため、ファイルシステムによらず順序が決まる。
+        - glob と同じく '.' で始まる隠しファイル・隠しディレクトリは対象外
+        - glob と同じくシンボリックリンク先のディレクトリも辿る（実体が同じディレクトリは一度だけ辿り、循環を防ぐ）
+        - build、target、distディレクトリは走査時に枝刈りする（WEB-INF配下は除外しない）
+        os.scandir の DirEntry から得た stat は analyze_file で再利用する
+        """
+        files_by_ext = {ext: [] for ext in self._JSP_EXTENSIONS}
+        self._file_stats = {}
+        try:
+            root_stat = os.stat(self.project_dir)
+        except OSError:
+            return []
+        visited_dirs = {(root_stat.st_dev, root_stat.st_ino)}
+        stack = [(self.project_dir, False)]
+        while stack:
+            root, in_webinf = stack.pop()
+            try:
+                with os.scandir(root) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError:
+                continue
+
+            subdirs = []
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir():
+                    if not in_webinf and entry.name in self._EXCLUDED_DIRS:
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    key = (st.st_dev, st.st_ino)
+                    if key in visited_dirs:
+                        continue
+                    visited_dirs.add(key)
+                    subdirs.append((entry.path, in_webinf or entry.name == 'WEB-INF'))
+                    continue
+                for ext in self._JSP_EXTENSIONS:
+                    if entry.name.endswith(ext):
+                        try:
+                            self._file_stats[entry.path] = entry.stat()
+                        except OSError:
+                            break
+                        files_by_ext[ext].append(entry.path)
                         break
-            if not exclude:
-                filtered_files.append(f)
-        
-        return filtered_files
+            # ディレクトリ内のファイルの後に、サブディレクトリを名前順に深さ優先で辿る
+            stack.extend(reversed(subdirs))
+
+        return [path for ext in self._JSP_EXTENSIONS for path in files_by_ext[ext]]
 
     def analyze_project(self):
         """プロジェクト全体を解析"""
@@ -126,15 +644,19 @@ class UnifiedJSPAnalyzer:
         
         print(f"{len(files)}個のJSPファイルを解析中...")
         
-        # ファイルごとに解析
-        for i, file_path in enumerate(files, 1):
-            if self.verbose:
-                print(f"[{i}/{len(files)}] {file_path} を解析中...")
-            else:
-                if i % 10 == 0:
-                    print(f"  {i}/{len(files)} ファイル処理済み...")
-            
-            self.analyze_file(file_path)
+        # ファイルごとに解析（ファイル同士は独立しているため、十分な数があればプロセス並列で処理）
+        if self.jobs > 1 and len(files) >= self._PARALLEL_MIN_FILES:
+            worker = functools.partial(_analyze_file_worker, project_dir=self.project_dir,
+                                       verbose=self.verbose, deep_html=self.deep_html)
+            stats = [self._file_stats.get(file_path) for file_path in files]
+            with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                for i, (file_path, partial) in enumerate(zip(files, executor.map(worker, files, stats, chunksize=8)), 1):
+                    self._report_progress(i, len(files), file_path)
+                    self._merge_file_results(partial)
+        else:
+            for i, file_path in enumerate(files, 1):
+                self._report_progress(i, len(files), file_path)
+                self.analyze_file(file_path, self._file_stats.get(file_path))
         
         # 依存関係とパターン解析
         print("依存関係グラフを構築中...")
@@ -143,23 +665,88 @@ class UnifiedJSPAnalyzer:
         print("結合度メトリクスを計算中...")
         self.calculate_coupling_metrics()
         
-        if HAS_BEAUTIFULSOUP:
-            print("HTMLパターンを解析中...")
-            self._analyze_html_patterns()
-        
-        print("Javaパターンを解析中...")
-        self._analyze_java_patterns()
-        
         print("問題パターンを検出中...")
         self._identify_issue_patterns()
         
+        # レポートが共有する集計値はここで作成しておく（レポートを並行に生成しても遅延作成が競合しない）
+        self._compute_summary()
+        self._get_path_of()
+        self._get_include_map()
+        
         print(f"\n解析完了: {len(self.jsp_files)}個のJSPファイルを処理しました")
 
-    def analyze_file(self, file_path):
-        """単一のJSPファイルを解析"""
-        content = self._read_file_content(file_path)
+    def _compute_summary(self):
+        """各レポートで共通に使うプロジェクト全体の集計値を一度だけ計算して保持"""
+        # 合計値と「使用しているファイル数」はメトリクスを1回走査してまとめて数える
+        total_loc = total_scriptlets = total_jstl = total_el = 0
+        files_with_scriptlets = files_with_jstl = files_with_el = 0
+        # 最も複雑なファイル（同値なら先に現れたもの）も同じ走査で求める
+        most_complex_id = None
+        max_complexity = 0
+        for file_id, m in self.metrics.items():
+            total_loc += m.get('コード行数', 0)
+            scriptlets = m.get('スクリプトレット数', 0)
+            jstl = m.get('JSTL合計タグ数', 0)
+            el = m.get('EL式合計', 0)
+            total_scriptlets += scriptlets
+            total_jstl += jstl
+            total_el += el
+            files_with_scriptlets += scriptlets > 0
+            files_with_jstl += jstl > 0
+            files_with_el += el > 0
+            complexity = m.get('JSP複雑度指標', 0)
+            if most_complex_id is None or complexity > max_complexity:
+                most_complex_id = file_id
+                max_complexity = complexity
+
+        self._summary = {
+            'total_files': len(self.jsp_files),
+            'total_loc': total_loc,
+            'total_scriptlets': total_scriptlets,
+            'total_jstl': total_jstl,
+            'total_el': total_el,
+            'total_issues': sum(len(issues) for issues in self.issues.values()),
+            'files_with_scriptlets': files_with_scriptlets,
+            'files_with_jstl': files_with_jstl,
+            'files_with_el': files_with_el,
+            'most_complex_file': most_complex_id,
+            'max_complexity': max_complexity
+        }
+        return self._summary
+
+    def _get_summary(self):
+        """集計値を返す（analyze_project を経ずにレポートを出す場合はここで計算）"""
+        if self._summary is None:
+            return self._compute_summary()
+        return self._summary
+
+    def _report_progress(self, i, total, file_path):
+        """ファイル解析の進捗を表示"""
+        if self.verbose:
+            print(f"[{i}/{total}] {file_path} を解析中...")
+        else:
+            if i % 10 == 0:
+                print(f"  {i}/{total} ファイル処理済み...")
+
+    def _file_results(self):
+        """analyze_file で得たファイル単位の抽出結果を属性名ごとの辞書で返す"""
+        return {name: dict(getattr(self, name)) for name in self._PER_FILE_ATTRS}
+
+    def _merge_file_results(self, partial):
+        """_file_results の結果を自身の抽出データにマージ"""
+        for name, values in partial.items():
+            getattr(self, name).update(values)
+
+    def analyze_file(self, file_path, stat=None):
+        """単一のJSPファイルを解析（stat は scan_files で取得済みの os.stat_result）"""
+        data = self._read_file_bytes(file_path)
+        if data is None:
+            return
+        content = self._decode_content(data, file_path)
         if content is None:
             return
+        if stat is None:
+            stat = os.stat(file_path)
         
         relative_path = os.path.relpath(file_path, self.project_dir)
         file_id = relative_path.replace('\\', '/').replace('.', '_')
@@ -168,31 +755,39 @@ class UnifiedJSPAnalyzer:
         self.jsp_files[file_id] = {
             'path': relative_path,
             'full_path': file_path,
-            'size': os.path.getsize(file_path),
-            'last_modified': datetime.fromtimestamp(os.path.getmtime(file_path)).strftime('%Y-%m-%d %H:%M:%S')
+            'size': stat.st_size,
+            'last_modified': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
         }
         
+        # 抽出時に種別だけを列として並べておき、メトリクスは Counter 一回で集計する
+        self._type_columns = defaultdict(list)
+
         try:
+            # コメントと<script>を除いたクリーン版はファイルごとに一度だけ作成する
+            # （EL はHTMLコメントや<script>内でも評価されるため元の内容で抽出する）
+            clean = self._strip_comments_and_scripts(content)
+
             # 各要素を抽出
-            self._extract_directives(content, file_id)
+            literals = _find_literals(content)
+            self._extract_all(content, file_id, literals)
             self._extract_includes(content, file_id)
-            self._extract_scriptlets(content, file_id)
-            self._extract_expressions(content, file_id)
-            self._extract_declarations(content, file_id)
+            self._extract_scriptlets(content, file_id, clean)
             self._extract_actions(content, file_id)
-            self._extract_el_expressions(content, file_id)
-            self._extract_jstl_usage(content, file_id)
-            self._extract_custom_tags(content, file_id)
-            self._extract_forms(content, file_id)
-            self._extract_implicit_objects(content, file_id)
-            self._extract_db_operations(content, file_id)
+            self._extract_forms(content, file_id, clean)
+            self._extract_db_operations(content, file_id, literals)
             self._extract_frontend_elements(content, file_id)
             
             # メトリクスを計算
-            self._calculate_file_metrics(content, file_id)
+            self._calculate_file_metrics(content, file_id, data)
             
             # セキュリティ問題を検出
-            self._detect_security_issues(content, file_id)
+            self._detect_security_issues(content, file_id, literals)
+            
+            # HTMLパターンを解析（読み込み済みの内容をそのまま使う）
+            self._analyze_html_patterns(content, file_id)
+            
+            # Javaパターンを解析
+            self._analyze_java_patterns(file_id)
             
         except Exception as e:
             self.log(f"警告: {file_path} の解析中にエラーが発生しました: {e}")
@@ -201,19 +796,42 @@ class UnifiedJSPAnalyzer:
                 'message': f"ファイル解析中にエラーが発生: {str(e)}"
             })
 
+        self._prune_empty_entries(file_id)
+
+    def _prune_empty_entries(self, file_id):
+        """メトリクス計算などの参照で作られた空のエントリを削除し、該当要素を持つファイルだけを残す"""
+        for name in self._PER_FILE_ATTRS:
+            values = getattr(self, name)
+            if isinstance(values, defaultdict) and file_id in values and not values[file_id]:
+                del values[file_id]
+
     def _read_file_content(self, file_path):
-        """ファイル内容を読み込み（複数のエンコーディングを試行）"""
-        encodings = ['utf-8', 'shift-jis', 'euc-jp', 'iso-2022-jp', 'latin-1']
-        
-        for encoding in encodings:
+        """ファイル内容を読み込み（バイト列を一度だけ読み、複数のエンコーディングでデコードを試行）"""
+        data = self._read_file_bytes(file_path)
+        if data is None:
+            return None
+        return self._decode_content(data, file_path)
+
+    def _read_file_bytes(self, file_path):
+        """ファイルをバイト列として読み込む"""
+        try:
+            with open(file_path, 'rb') as f:
+                return f.read()
+        except Exception as e:
+            self.log(f"警告: {file_path} を読み込めませんでした: {e}")
+            return None
+
+    def _decode_content(self, data, file_path):
+        """バイト列を複数のエンコーディングで順にデコードし、改行コードを \\n に揃える"""
+        for encoding in self._ENCODINGS:
             try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    return f.read()
+                text = data.decode(encoding)
             except UnicodeDecodeError:
                 continue
-            except Exception as e:
-                self.log(f"警告: {file_path} を読み込めませんでした: {e}")
-                return None
+            # テキストモードで開いた場合と同じく改行コードを \n に揃える
+            if '\r' in text:
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+            return text
         
         self.log(f"警告: {file_path} はどのエンコーディングでも読み込めませんでした")
         return None
@@ -222,7 +840,7 @@ class UnifiedJSPAnalyzer:
         """属性文字列を安定的にパースして辞書で返す。クォートあり/なしの両方に対応。"""
         attrs: Dict[str, str] = {}
         # matches key="value" or key='value' or key=value
-        for m in re.finditer(r"(\w+)\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s>]+))", text):
+        for m in _RE_ATTR.finditer(text):
             key = m.group(1)
             val = m.group(2) if m.group(2) is not None else (m.group(3) if m.group(3) is not None else (m.group(4) or ''))
             attrs[key] = val
@@ -230,94 +848,155 @@ class UnifiedJSPAnalyzer:
 
     def _strip_comments_and_scripts(self, content: str) -> str:
         """JSP/HTMLのコメントと<script>ブロックを取り除いた文字列を返す（抽出用のクリーン版）。"""
-        s = re.sub(r'<%--.*?--%>', '', content, flags=re.DOTALL)
-        s = re.sub(r'<!--.*?-->', '', s, flags=re.DOTALL)
-        s = re.sub(r'<script[^>]*>.*?</script>', '', s, flags=re.DOTALL | re.IGNORECASE)
+        s = _RE_JSP_COMMENT.sub('', content)
+        s = _RE_HTML_COMMENT.sub('', s)
+        s = _RE_SCRIPT_BLOCK.sub('', s)
         return s
 
     def _remove_java_string_literals(self, code: str) -> str:
         """Java/C 形式の文字列リテラルと文字リテラルを除去し、キーワード検出時の誤検出を防ぎます。"""
         # ダブルクォート/シングルクォートの文字列と文字リテラルを簡易的に置換
-        code = re.sub(r'"(\\.|[^"\\])*"', '""', code)
-        code = re.sub(r"'(\\.|[^'\\])*'", "''", code)
+        code = _RE_JAVA_STRING_LITERAL.sub(lambda m: m.group(0)[0] * 2, code)
         # ブロックコメントと行コメントを除去
-        code = re.sub(r'/\*.*?\*/', '', code, flags=re.DOTALL)
-        code = re.sub(r'//.*?$', '', code, flags=re.MULTILINE)
+        code = _RE_JAVA_BLOCK_COMMENT.sub('', code)
+        code = _RE_JAVA_LINE_COMMENT.sub('', code)
         return code
 
+    def _build_path_indexes(self):
+        """jsp_files から正規化パス・basename・WEB-INF/tags の索引を一度だけ構築"""
+        self._norm_paths = {}
+        self._path_index = {}
+        self._basename_index = defaultdict(list)
+        self._suffix_index = {}
+        self._webinf_tags_index = {}
+        self._tag_file_cache = {}
+        self._include_resolution_cache = {}
+        for target_id, info in self.jsp_files.items():
+            p = info.get('path', '')
+            if not p:
+                continue
+            normalized = p.replace('\\', '/')
+            base = os.path.basename(p)
+            self._norm_paths[target_id] = normalized
+            self._path_index[normalized.lstrip('/')] = target_id
+            self._basename_index[base].append(target_id)
+            # 'a/b/c.jsp' -> 'b/c.jsp', 'c.jsp'（走査順で最初のファイルを優先）
+            parts = normalized.split('/')
+            for i in range(1, len(parts)):
+                self._suffix_index.setdefault('/'.join(parts[i:]), target_id)
+            if '/WEB-INF/tags/' in p:
+                self._webinf_tags_index.setdefault(base, target_id)
+
+    def _find_file_by_path(self, path):
+        """正規化済みのパスに一致するファイル、無ければそのパスでディレクトリ単位に終わる最初のファイルのIDを返す"""
+        path = path.lstrip('/')
+        if not path:
+            return None
+        if path in self._path_index:
+            return self._path_index[path]
+        return self._suffix_index.get(path)
+
+    def _resolve_include_target(self, caller_dir, target):
+        """インクルード先を (パスで一致したファイルID, basename のみ一致したファイルID) として解決する。
+        同じディレクトリから同じ対象を参照することが多いため、結果は (caller_dir, target) ごとにキャッシュする。"""
+        key = (caller_dir, target)
+        if key in self._include_resolution_cache:
+            return self._include_resolution_cache[key]
+
+        normalized_target = _normalize_ref_path(target)
+        # build candidate paths to match against known files (caller-relative first)
+        candidates = []
+        if caller_dir and not normalized_target.startswith('/'):
+            candidates.append(_normalize_ref_path(os.path.join(caller_dir, normalized_target)))
+        candidates.append(normalized_target)
+
+        result = (None, None)
+        for cand in candidates:
+            target_id = self._find_file_by_path(cand)
+            if target_id:
+                result = (target_id, None)
+                break
+        else:
+            same_name = self._basename_index.get(os.path.basename(normalized_target))
+            if same_name:
+                result = (None, same_name[0])
+
+        self._include_resolution_cache[key] = result
+        return result
+
     def _resolve_tag_file(self, prefix: str, tagname: str, caller_file_id: str) -> Optional[str]:
         """カスタムタグ(prefix:tagname)を既知の .tag/.tagx ファイルIDに解決しようとします。
         見つかれば target_id を返し、見つからなければ None を返します。
         戦略:
-          1) プロジェクト内で basename(tagname.tag/.tagx) を探す
-          2) 呼び出し元の tag_libraries 宣言を参照して prefix->uri をマップし、その uri 配下を検索する
-          3) WEB-INF/tags 配下のタグファイルを優先する
+          1) WEB-INF/tags 配下のタグファイルを優先する
+          2) プロジェクト内で basename(tagname.tag/.tagx) を探す
+        taglib の uri 配下のタグファイルも basename は tagname.tag/.tagx となるため 2) で解決されます。
+        結果は tagname のみで決まるためキャッシュします。
         """
-        candidates = [f"{tagname}.tag", f"{tagname}.tagx", tagname]
+        if tagname in self._tag_file_cache:
+            return self._tag_file_cache[tagname]
 
+        candidates = (f"{tagname}.tag", f"{tagname}.tagx", tagname)
+        target_id = None
         # WEB-INF/tags 配下を優先
-        for target_id, info in self.jsp_files.items():
-            p = info.get('path','')
-            base = os.path.basename(p)
-            if base in candidates and '/WEB-INF/tags/' in p:
-                return target_id
-
-        # プロジェクト内のベース名マッチを検索
-        for target_id, info in self.jsp_files.items():
-            p = info.get('path','')
-            base = os.path.basename(p)
-            if base in candidates:
-                return target_id
-
-        # 呼び出し元の taglib 宣言を参照して解決を試みる
-        if caller_file_id in self.tag_libraries:
-            for lib in self.tag_libraries[caller_file_id]:
-                uri = lib.get('uri','')
-                if uri:
-                    candidate_suffix = uri.split(':')[-1].lstrip('/')
-                    for target_id, info in self.jsp_files.items():
-                        p = info.get('path','')
-                        if p.endswith(os.path.join(candidate_suffix, f"{tagname}.tag")) or p.endswith(os.path.join(candidate_suffix, f"{tagname}.tagx")):
-                            return target_id
-
-        return None
-
-    def _extract_directives(self, content, file_id):
-        """JSPディレクティブを抽出"""
-        patterns = {
-            'page': r'<%@\s*page\s+([^%>]+)%>',
-            'include': r'<%@\s*include\s+([^%>]+)%>',
-            'taglib': r'<%@\s*taglib\s+([^%>]+)%>',
-            'tag': r'<%@\s*tag\s+([^%>]+)%>',
-            'attribute': r'<%@\s*attribute\s+([^%>]+)%>',
-            'variable': r'<%@\s*variable\s+([^%>]+)%>'
-        }
-        
-        for directive_type, pattern in patterns.items():
-            for match in re.finditer(pattern, content, re.DOTALL):
-                directive_content = match.group(1)
-                
-                attributes = {}
-                for attr_match in re.finditer(r'(\w+)\s*=\s*["\']([^"\']+)["\']', directive_content):
-                    attributes[attr_match.group(1)] = attr_match.group(2)
-                
-                self.directives[file_id].append({
-                    'type': directive_type,
-                    'attributes': attributes,
-                    'raw': match.group(0)
-                })
-                
-                # タグライブラリの場合は別途記録
-                if directive_type == 'taglib' and 'uri' in attributes and 'prefix' in attributes:
-                    self.tag_libraries[file_id].append({
-                        'prefix': attributes['prefix'],
-                        'uri': attributes['uri']
-                    })
+        for base in candidates:
+            if base in self._webinf_tags_index:
+                target_id = self._webinf_tags_index[base]
+                break
+        else:
+            # プロジェクト内のベース名マッチを検索
+            for base in candidates:
+                if self._basename_index.get(base):
+                    target_id = self._basename_index[base][0]
+                    break
+
+        self._tag_file_cache[tagname] = target_id
+        return target_id
+
+    def _extract_all(self, content, file_id, literals=None):
+        """ディレクティブ・式・宣言・EL式・タグ・暗黙オブジェクトを抽出（literals は _find_literals の結果）"""
+        # アンカーが1つも現れない種別は走査しない（HTML主体の断片ファイルでは大半の種別が該当）
+        present = _present_scan_kinds(content) if _present_scan_kinds else None
+        if present is None and literals is None:
+            literals = _find_literals(content)
+        for index, (kind, pattern, _, literal) in enumerate(_SCAN_KINDS):
+            if present is None:
+                if literal is not None and literal not in literals:
+                    continue
+            elif index not in present:
+                continue
+            handler = getattr(self, '_handle_' + kind)
+            for match in pattern.finditer(content):
+                handler(match, file_id)
+
+    def _handle_directive(self, match, file_id):
+        """JSPディレクティブを記録"""
+        # 種別や属性名・タグ名などの語彙は何度も現れるため intern して同一オブジェクトを共有する
+        directive_type = sys.intern(match.group(1))
+        directive_content = match.group(2)
+
+        attributes = {}
+        for attr_match in _RE_QUOTED_ATTR.finditer(directive_content):
+            attributes[sys.intern(attr_match.group(1))] = attr_match.group(2)
+
+        self.directives[file_id].append({
+            'type': directive_type,
+            'attributes': attributes,
+            'raw': match.group(0)
+        })
+        self._type_columns['directive'].append(directive_type)
+
+        # タグライブラリの場合は別途記録
+        if directive_type == 'taglib' and 'uri' in attributes and 'prefix' in attributes:
+            self.tag_libraries[file_id].append({
+                'prefix': attributes['prefix'],
+                'uri': attributes['uri']
+            })
 
     def _extract_includes(self, content, file_id):
         """インクルード関係を抽出"""
         # ディレクティブインクルード
-        for match in re.finditer(r'<%@\s*include\s+file\s*=\s*["\']([^"\']+)["\'][^%>]*%>', content):
+        for match in _RE_INCLUDE_DIRECTIVE.finditer(content):
             self.includes[file_id].append({
                 'type': 'directive',
                 'file': match.group(1),
@@ -325,7 +1004,7 @@ class UnifiedJSPAnalyzer:
             })
         
         # JSPアクションインクルード
-        for match in re.finditer(r'<jsp:include\s+[^>]*page\s*=\s*["\']([^"\']+)["\'][^>]*>', content):
+        for match in _RE_INCLUDE_ACTION.finditer(content):
             self.includes[file_id].append({
                 'type': 'action',
                 'page': match.group(1),
@@ -333,19 +1012,20 @@ class UnifiedJSPAnalyzer:
             })
         
         # JSTL c:import
-        for match in re.finditer(r'<c:import\s+[^>]*url\s*=\s*["\']([^"\']+)["\'][^>]*>', content):
+        for match in _RE_C_IMPORT.finditer(content):
             self.includes[file_id].append({
                 'type': 'c:import',
                 'url': match.group(1),
                 'raw': match.group(0)
             })
 
-    def _extract_scriptlets(self, content, file_id):
+    def _extract_scriptlets(self, content, file_id, clean=None):
         """スクリプトレットを抽出"""
-        clean = self._strip_comments_and_scripts(content)
+        if clean is None:
+            clean = self._strip_comments_and_scripts(content)
 
         # _extract_includes ですでにインクルード抽出を行っているが、冗長性のためここでもディレクティブ形式を補足する
-        for match in re.finditer(r'<%@\s*include\s+([^%>]+)%>', clean, flags=re.IGNORECASE):
+        for match in _RE_INCLUDE_DIRECTIVE_ATTRS.finditer(clean):
             attrs = self._parse_attributes(match.group(1))
             f = attrs.get('file') or attrs.get('page')
             if f:
@@ -356,7 +1036,7 @@ class UnifiedJSPAnalyzer:
                 })
 
         # JSPアクションによるインクルード <jsp:include ...>
-        for match in re.finditer(r'<jsp:include\s+([^>]+)>', clean, flags=re.IGNORECASE):
+        for match in _RE_INCLUDE_ACTION_ATTRS.finditer(clean):
             attrs = self._parse_attributes(match.group(1))
             page = attrs.get('page') or attrs.get('file')
             if page:
@@ -367,7 +1047,7 @@ class UnifiedJSPAnalyzer:
                 })
 
         # JSTL の c:import を抽出
-        for match in re.finditer(r'<c:import\s+([^>]+)>', clean, flags=re.IGNORECASE):
+        for match in _RE_C_IMPORT_ATTRS.finditer(clean):
             attrs = self._parse_attributes(match.group(1))
             url = attrs.get('url') or attrs.get('page')
             if url:
@@ -378,7 +1058,9 @@ class UnifiedJSPAnalyzer:
                 })
 
         # <% ... %> のスクリプトレットを抽出（ディレクティブ <%@、式 <%=、宣言 <%! は除外）
-        for match in re.finditer(r'<%(?!@|=|!)(.*?)%>', content, flags=re.DOTALL):
+        if '<%' not in content:
+            return
+        for match in _RE_SCRIPTLET.finditer(content):
             code = match.group(1).strip()
             if not code:
                 continue
@@ -387,78 +1069,8 @@ class UnifiedJSPAnalyzer:
             # 行数と改良された複雑度ヒューリスティックを計算
             lines = len(code.splitlines())
 
-            # ASTベース解析を javalang が利用可能な場合に試行
-            decision_count = 0
-            logical_ops = 0
-            ternary_ops = 0
-            nesting_score = 0
-
-            if HAS_JAVALANG:
-                try:
-                    # javalang はコンパイルユニットを期待するため、必要に応じてダミークラス/メソッドでラップする
-                    wrapped = f"class X {{ void m() {{ {clean_code} }} }}"
-                    tree = javalang.parse.parse(wrapped)
-
-                    # AST を辿って分岐ノードをカウントし、ネストを推定する
-                    max_depth = 0
-                    cur_depth = 0
-
-                    for path, node in tree:
-                        nodename = type(node).__name__
-                        # 分岐やループ系ノードを発見したらカウント
-                        if nodename in ('IfStatement', 'ForStatement', 'WhileStatement', 'DoStatement', 'SwitchStatement', 'TryStatement'):
-                            decision_count += 1
-                        # 三項演算子をカウント
-                        if nodename == 'TernaryExpression' or nodename == 'ConditionalExpression':
-                            ternary_ops += 1
-                        # BinaryOperation ノードの演算子が && または || の場合は論理演算子としてカウント
-                        if nodename == 'BinaryOperation':
-                            op = getattr(node, 'operator', None)
-                            if op in ['&&', '||']:
-                                logical_ops += 1
-
-                        # BlockStatement / Block ノードでネストを近似
-                        if nodename in ('BlockStatement', 'Block'):
-                            cur_depth += 1
-                            if cur_depth > max_depth:
-                                max_depth = cur_depth
-                        # ブロックを抜けるようなノードで深さを軽減する（完全ではないがヒューリスティック）
-                        if nodename in ('ReturnStatement', 'BreakStatement', 'ContinueStatement'):
-                            cur_depth = max(0, cur_depth - 1)
-
-                    nesting_score = int(max_depth / 2)
-                except Exception:
-                    # パースに失敗した場合は従来のヒューリスティックにフォールバック
-                    decision_keywords = [r'\bif\b', r'\bfor\b', r'\bwhile\b', r'\bswitch\b', r'\bcase\b', r'\bcatch\b', r'\belse\b']
-                    decision_count = sum(len(re.findall(kw, clean_code, flags=re.IGNORECASE)) for kw in decision_keywords)
-                    logical_ops = len(re.findall(r'&&|\|\|', clean_code))
-                    ternary_ops = len(re.findall(r'\?', clean_code))
-                    max_depth = 0
-                    cur_depth = 0
-                    for ch in clean_code:
-                        if ch == '{':
-                            cur_depth += 1
-                            if cur_depth > max_depth:
-                                max_depth = cur_depth
-                        elif ch == '}':
-                            cur_depth = max(0, cur_depth - 1)
-                    nesting_score = int(max_depth / 2)
-            else:
-                # javalang が利用できない場合は従来のヒューリスティックを使用
-                decision_keywords = [r'\bif\b', r'\bfor\b', r'\bwhile\b', r'\bswitch\b', r'\bcase\b', r'\bcatch\b', r'\belse\b']
-                decision_count = sum(len(re.findall(kw, clean_code, flags=re.IGNORECASE)) for kw in decision_keywords)
-                logical_ops = len(re.findall(r'&&|\|\|', clean_code))
-                ternary_ops = len(re.findall(r'\?', clean_code))
-                max_depth = 0
-                cur_depth = 0
-                for ch in clean_code:
-                    if ch == '{':
-                        cur_depth += 1
-                        if cur_depth > max_depth:
-                            max_depth = cur_depth
-                    elif ch == '}':
-                        cur_depth = max(0, cur_depth - 1)
-                nesting_score = int(max_depth / 2)
+            # 複雑度の内訳を計算（同一のスクリプトレットはキャッシュから取得）
+            decision_count, logical_ops, ternary_ops, nesting_score = _parse_scriptlet_complexity(clean_code)
 
             complexity = decision_count + logical_ops + ternary_ops + nesting_score
             if complexity <= 0:
@@ -473,45 +1085,35 @@ class UnifiedJSPAnalyzer:
                 'raw': match.group(0)
             })
 
-    def _extract_expressions(self, content, file_id):
-        """JSP式を抽出"""
-        expression_pattern = r'<%=(.*?)%>'
-        for match in re.finditer(expression_pattern, content, re.DOTALL):
-            expression = match.group(1).strip()
-            self.expressions[file_id].append({
-                'expression': expression,
-                'start_position': match.start(),
-                'raw': match.group(0)
-            })
-
-    def _extract_declarations(self, content, file_id):
-        """JSP宣言を抽出"""
-        declaration_pattern = r'<%!(.*?)%>'
-        for match in re.finditer(declaration_pattern, content, re.DOTALL):
-            declaration = match.group(1).strip()
-            self.declarations[file_id].append({
-                'declaration': declaration,
-                'start_position': match.start(),
-                'raw': match.group(0)
-            })
+    def _handle_expression(self, match, file_id):
+        """JSP式を記録（<%= ... %> 全体の写しは持たず、式本体と位置だけを保持する）"""
+        start, end = match.span()
+        self.expressions[file_id].append({
+            'expression': match.group(1).strip(),
+            'start_position': start,
+            'end_position': end
+        })
+
+    def _handle_declaration(self, match, file_id):
+        """JSP宣言を記録（<%! ... %> 全体の写しは持たず、宣言本体と位置だけを保持する）"""
+        start, end = match.span()
+        self.declarations[file_id].append({
+            'declaration': match.group(1).strip(),
+            'start_position': start,
+            'end_position': end
+        })
 
     def _extract_actions(self, content, file_id):
         """JSPアクションを抽出"""
-        action_patterns = [
-            ('useBean', r'<jsp:useBean\s+([^/>]+)(?:/?>)'),
-            ('setProperty', r'<jsp:setProperty\s+([^/>]+)(?:/?>)'),
-            ('getProperty', r'<jsp:getProperty\s+([^/>]+)(?:/?>)'),
-            ('forward', r'<jsp:forward\s+([^/>]+)(?:/?>)'),
-            ('param', r'<jsp:param\s+([^/>]+)(?:/?>)')
-        ]
-        
-        for action_type, pattern in action_patterns:
-            for match in re.finditer(pattern, content):
+        if '<jsp:' not in content:
+            return
+        for action_type, pattern in self._ACTION_PATTERNS:
+            for match in pattern.finditer(content):
                 action_content = match.group(1)
                 
                 attributes = {}
-                for attr_match in re.finditer(r'(\w+)\s*=\s*["\']([^"\']+)["\']', action_content):
-                    attributes[attr_match.group(1)] = attr_match.group(2)
+                for attr_match in _RE_QUOTED_ATTR.finditer(action_content):
+                    attributes[sys.intern(attr_match.group(1))] = attr_match.group(2)
                 
                 self.actions[file_id].append({
                     'type': action_type,
@@ -519,174 +1121,187 @@ class UnifiedJSPAnalyzer:
                     'raw': match.group(0)
                 })
 
-    def _extract_el_expressions(self, content, file_id):
-        """EL式を抽出"""
-        # 標準EL式
-        for match in re.finditer(r'\${([^}]+)}', content):
-            self.el_expressions[file_id].append({
-                'expression': match.group(1),
-                'type': 'standard',
+    def _handle_el(self, match, file_id):
+        """標準EL式を記録（sessionScope / param の参照は暗黙オブジェクト使用としても記録）"""
+        expression = match.group(1)
+        raw = match.group(0)
+        self.el_expressions[file_id].append({
+            'expression': expression,
+            'type': 'standard',
+            'raw': raw
+        })
+        self._type_columns['el'].append('standard')
+
+        scope_match = expression.startswith('sessionScope.') and _RE_SESSION_SCOPE_EL.match(raw)
+        if scope_match:
+            self.session_usage[file_id].append({
+                'attribute': sys.intern(scope_match.group(1)),
+                'operation': 'get',
+                'raw': scope_match.group(0)
+            })
+            return
+
+        param_match = expression.startswith('param.') and _RE_PARAM_EL.match(raw)
+        if param_match:
+            self.request_usage[file_id].append({
+                'attribute': sys.intern(param_match.group(1)),
+                'operation': 'parameter',
+                'raw': param_match.group(0)
+            })
+
+    def _handle_deferred_el(self, match, file_id):
+        """遅延評価EL式を記録"""
+        self.el_expressions[file_id].append({
+            'expression': match.group(1),
+            'type': 'deferred',
+            'raw': match.group(0)
+        })
+        self._type_columns['el'].append('deferred')
+
+    def _handle_prefixed_tag(self, match, file_id):
+        """prefix:tag 形式のタグを JSTL 標準タグまたはカスタムタグとして記録"""
+        prefix = sys.intern(match.group(1))
+        tag = sys.intern(match.group(2))
+
+        library = self._JSTL_TAG_LIBRARIES.get(prefix)
+        if library:
+            self.jstl_usage[file_id].append({
+                'library': library,
+                'tag': tag,
                 'raw': match.group(0)
             })
-        
-        # 遅延評価EL式
-        for match in re.finditer(r'#{([^}]+)}', content):
-            self.el_expressions[file_id].append({
-                'expression': match.group(1),
-                'type': 'deferred',
+            self._type_columns['jstl_library'].append(library)
+            self._type_columns['jstl_tag'].append(tag)
+
+        # JSTL標準タグは除外
+        if prefix not in self._NON_CUSTOM_TAG_PREFIXES:
+            self.custom_tags[file_id].append({
+                'prefix': prefix,
+                'tag': tag,
                 'raw': match.group(0)
             })
 
-    def _extract_jstl_usage(self, content, file_id):
-        """JSTL使用状況を抽出"""
-        jstl_patterns = {
-            'core': r'<c:(\w+)',
-            'fmt': r'<fmt:(\w+)',
-            'sql': r'<sql:(\w+)',
-            'xml': r'<x:(\w+)',
-            'fn': r'fn:(\w+)\('
-        }
-        
-        for tag_type, pattern in jstl_patterns.items():
-            for match in re.finditer(pattern, content):
-                tag_name = match.group(1)
-                self.jstl_usage[file_id].append({
-                    'library': tag_type,
-                    'tag': tag_name,
-                    'raw': match.group(0)
-                })
-
-    def _extract_custom_tags(self, content, file_id):
-        """カスタムタグを抽出"""
-        custom_tag_pattern = r'<([a-zA-Z0-9_]+):([a-zA-Z0-9_]+)'
-        for match in re.finditer(custom_tag_pattern, content):
-            prefix = match.group(1)
-            tag = match.group(2)
-            
-            # JSTL標準タグは除外
-            if prefix not in ['c', 'fmt', 'sql', 'x', 'fn', 'jsp']:
-                self.custom_tags[file_id].append({
-                    'prefix': prefix,
-                    'tag': tag,
-                    'raw': match.group(0)
-                })
-
-    def _extract_forms(self, content, file_id):
-        """フォーム情報を抽出"""
-        clean = self._strip_comments_and_scripts(content)
+    def _handle_jstl_fn(self, match, file_id):
+        """JSTL関数（fn:）の使用を記録"""
+        self.jstl_usage[file_id].append({
+            'library': 'fn',
+            'tag': sys.intern(match.group(1)),
+            'raw': match.group(0)
+        })
+
+    def _extract_forms(self, content, file_id, clean=None):
+        """フォーム情報を抽出（lxml → BeautifulSoup(html.parser) → 正規表現の順に試行）"""
+        if clean is None:
+            clean = self._strip_comments_and_scripts(content)
+        # <form が無ければHTMLパースを省略（インクルード用の断片など）
+        if not _RE_FORM_OPEN.search(clean):
+            return
 
-        if HAS_BEAUTIFULSOUP:
+        for available, parse_forms in (
+            (HAS_LXML, self._parse_forms_lxml),
+            (HAS_BEAUTIFULSOUP, self._parse_forms_bs4),
+        ):
+            if not available:
+                continue
             try:
-                soup = BeautifulSoup(clean, 'html.parser')
-                for form in soup.find_all('form'):
-                    action = form.get('action') or ''
-                    method = (form.get('method') or 'get').lower()
-                    inputs = form.find_all(['input', 'select', 'textarea'])
-                    form_info = {
-                        'action': action,
-                        'method': method,
-                        'inputs': [i.name for i in inputs],
-                        'input_count': sum(1 for i in inputs if i.name == 'input'),
-                        'select_count': sum(1 for i in inputs if i.name == 'select'),
-                        'textarea_count': sum(1 for i in inputs if i.name == 'textarea')
-                    }
-                    self.forms[file_id].append(form_info)
-                return
+                forms = parse_forms(clean)
             except Exception:
-                pass
+                continue
+            if forms is None:
+                continue
+            self.forms[file_id].extend(forms)
+            return
 
         # fallback: regex-based extraction
-        form_pattern = r'<form\s+([^>]+)>(.*?)</form>'
-        for match in re.finditer(form_pattern, clean, re.DOTALL | re.IGNORECASE):
+        for match in _RE_FORM.finditer(clean):
             form_attrs = match.group(1)
-            form_content = match.group(2)
+            lower = match.group(2).lower()
             attrs = self._parse_attributes(form_attrs)
             form_info = {
                 'action': attrs.get('action', ''),
                 'method': attrs.get('method', 'get').lower(),
                 'inputs': [],
-                'input_count': len(re.findall(r'<input\s+', form_content, flags=re.IGNORECASE)),
-                'select_count': len(re.findall(r'<select\s+', form_content, flags=re.IGNORECASE)),
-                'textarea_count': len(re.findall(r'<textarea\s+', form_content, flags=re.IGNORECASE))
+                'input_count': _count_tag_opens(lower, 'input'),
+                'select_count': _count_tag_opens(lower, 'select'),
+                'textarea_count': _count_tag_opens(lower, 'textarea')
             }
             self.forms[file_id].append(form_info)
 
-    def _extract_implicit_objects(self, content, file_id):
-        """暗黙オブジェクトの使用を抽出"""
-        # セッション使用
-        session_patterns = [
-            r'session\.getAttribute\(["\'](\w+)["\']\)',
-            r'session\.setAttribute\(["\'](\w+)["\']',
-            r'session\.removeAttribute\(["\'](\w+)["\']\)',
-            r'\${sessionScope\.(\w+)}'
-        ]
-        
-        for pattern in session_patterns:
-            for match in re.finditer(pattern, content):
-                operation = 'get' if 'getAttribute' in pattern or 'sessionScope' in pattern else 'set' if 'setAttribute' in pattern else 'remove'
-                self.session_usage[file_id].append({
-                    'attribute': match.group(1) if match.lastindex else 'unknown',
-                    'operation': operation,
-                    'raw': match.group(0)
-                })
-        
-        # リクエスト使用
-        request_patterns = [
-            r'request\.getParameter\(["\'](\w+)["\']\)',
-            r'request\.getAttribute\(["\'](\w+)["\']\)',
-            r'request\.setAttribute\(["\'](\w+)["\']',
-            r'\${param\.(\w+)}'
-        ]
-        
-        for pattern in request_patterns:
-            for match in re.finditer(pattern, content):
-                operation = 'parameter' if 'getParameter' in pattern or 'param.' in pattern else 'get' if 'getAttribute' in pattern else 'set'
-                self.request_usage[file_id].append({
-                    'attribute': match.group(1) if match.lastindex else 'unknown',
-                    'operation': operation,
-                    'raw': match.group(0)
-                })
-        
-        # レスポンス使用
-        response_patterns = [
-            r'response\.sendRedirect\(["\']([^"\']+)["\']\)',
-            r'response\.setContentType\(["\']([^"\']+)["\']\)'
-        ]
-        
-        for pattern in response_patterns:
-            for match in re.finditer(pattern, content):
-                operation = 'redirect' if 'sendRedirect' in pattern else 'content_type'
-                self.response_usage[file_id].append({
-                    'operation': operation,
-                    'value': match.group(1) if match.lastindex else '',
-                    'raw': match.group(0)
-                })
+    def _form_info(self, action, method, input_names):
+        """HTMLパーサで得たフォームの属性と入力要素名からフォーム情報を組み立てる"""
+        return {
+            'action': action or '',
+            'method': (method or 'get').lower(),
+            'inputs': input_names,
+            'input_count': input_names.count('input'),
+            'select_count': input_names.count('select'),
+            'textarea_count': input_names.count('textarea')
+        }
 
-    def _extract_db_operations(self, content, file_id):
-        """データベース操作を抽出"""
-        # JDBC接続パターン
-        connection_patterns = [
-            r'Connection\s+\w+\s*=',
-            r'DriverManager\.getConnection',
-            r'DataSource\s+\w+\s*='
-        ]
-        
-        for pattern in connection_patterns:
-            if re.search(pattern, content):
+    def _parse_forms_lxml(self, clean):
+        """lxml.html でフォームを抽出"""
+        forms = []
+        if not clean.strip():
+            return forms
+        root = lxml.html.document_fromstring(clean)
+        for form in root.iter('form'):
+            inputs = [node.tag for node in form.iter('input', 'select', 'textarea')]
+            forms.append(self._form_info(form.get('action'), form.get('method'), inputs))
+        return forms
+
+    def _parse_forms_bs4(self, clean):
+        """BeautifulSoup (html.parser) でフォームを抽出"""
+        forms = []
+        soup = BeautifulSoup(clean, 'html.parser')
+        for form in soup.find_all('form'):
+            inputs = [i.name for i in form.find_all(['input', 'select', 'textarea'])]
+            forms.append(self._form_info(form.get('action'), form.get('method'), inputs))
+        return forms
+
+    def _handle_session(self, match, file_id):
+        """セッション使用を記録"""
+        method = match.group(1) or match.group(3)
+        self.session_usage[file_id].append({
+            'attribute': sys.intern(match.group(2) or match.group(4)),
+            'operation': self._SESSION_OPERATIONS[method],
+            'raw': match.group(0)
+        })
+
+    def _handle_request(self, match, file_id):
+        """リクエスト使用を記録"""
+        method = match.group(1) or match.group(3)
+        self.request_usage[file_id].append({
+            'attribute': sys.intern(match.group(2) or match.group(4)),
+            'operation': self._REQUEST_OPERATIONS[method],
+            'raw': match.group(0)
+        })
+
+    def _handle_response(self, match, file_id):
+        """レスポンス使用を記録"""
+        self.response_usage[file_id].append({
+            'operation': self._RESPONSE_OPERATIONS[match.group(1)],
+            'value': match.group(2),
+            'raw': match.group(0)
+        })
+
+    def _extract_db_operations(self, content, file_id, literals=None):
+        """データベース操作を抽出（literals は _find_literals の結果）"""
+        if literals is None:
+            literals = _find_literals(content)
+
+        # JDBC接続パターン（パターンに必要なキーワードが無ければ照合しない）
+        for literal, pattern in _DB_CONNECTION_PATTERNS:
+            if literal in literals and pattern.search(content):
                 self.db_operations[file_id].append({
                     'type': 'connection',
-                    'pattern': pattern
+                    'pattern': pattern.pattern
                 })
         
         # SQL実行パターン
-        sql_patterns = [
-            r'executeQuery\(["\']([^"\']+)["\']\)',
-            r'executeUpdate\(["\']([^"\']+)["\']\)',
-            r'prepareStatement\(["\']([^"\']+)["\']\)'
-        ]
-        
-        for pattern in sql_patterns:
-            for match in re.finditer(pattern, content):
+        for literal, pattern in _DB_SQL_PATTERNS:
+            if literal not in literals:
+                continue
+            for match in pattern.finditer(content):
                 sql = match.group(1)
                 operation_type = 'query' if 'select' in sql.lower() else 'update'
                 
@@ -699,69 +1314,86 @@ class UnifiedJSPAnalyzer:
     def _extract_frontend_elements(self, content, file_id):
         """フロントエンド要素を抽出"""
         # CSSクラス
-        for match in re.finditer(r'class\s*=\s*["\']([^"\']+)["\']', content):
+        for match in _RE_CSS_CLASS.finditer(content):
             classes = match.group(1).split()
             for css_class in classes:
                 if css_class and not css_class.startswith('${'):
                     self.css_classes[file_id].add(css_class)
         
         # JavaScript関数
-        for match in re.finditer(r'function\s+(\w+)\s*\(', content):
-            self.js_functions[file_id].add(f"def:{match.group(1)}")
+        defs = self.js_function_defs[file_id]
+        for match in _RE_JS_FUNCTION_DEF.finditer(content):
+            defs.add(match.group(1))
         
-        for match in re.finditer(r'(\w+)\s*\([^)]*\)', content):
+        calls = self.js_function_calls[file_id]
+        for match in _RE_JS_FUNCTION_CALL.finditer(content):
             func_name = match.group(1)
-            if func_name not in ['if', 'for', 'while', 'switch', 'catch']:
-                self.js_functions[file_id].add(f"call:{func_name}")
+            if func_name not in _JS_KEYWORDS:
+                calls.add(func_name)
+
+    def _calculate_file_metrics(self, content, file_id, data=None):
+        """ファイルメトリクスを計算（data はデコード前のバイト列。件数だけのパターンに使う）"""
+        if data is None:
+            data = content.encode('utf-8')
+        directive_types = Counter(self._type_columns['directive'])
+        el_types = Counter(self._type_columns['el'])
+        jstl_libraries = Counter(self._type_columns['jstl_library'])
+        jstl_tags = Counter(self._type_columns['jstl_tag'])
+        include_types = Counter(include['type'] for include in self.includes[file_id])
+
+        # スクリプトレットの行数と AST 複雑度は1回の走査でまとめて集計
+        scriptlet_lines = 0
+        ast_scriptlet_complexity = 0
+        for scriptlet in self.scriptlets[file_id]:
+            scriptlet_lines += scriptlet['lines']
+            ast_scriptlet_complexity += scriptlet.get('complexity', 0)
 
-    def _calculate_file_metrics(self, content, file_id):
-        """ファイルメトリクスを計算"""
         metrics = {
             'ファイルパス': self.jsp_files[file_id]['path'],
-            'コード行数': len(content.split('\n')),
+            'コード行数': content.count('\n') + 1,
             'ファイルサイズ': self.jsp_files[file_id]['size'],
             
             # ディレクティブ
-            'ページディレクティブ数': sum(1 for d in self.directives[file_id] if d['type'] == 'page'),
-            'インクルードディレクティブ数': sum(1 for d in self.directives[file_id] if d['type'] == 'include'),
-            'タグライブラリディレクティブ数': sum(1 for d in self.directives[file_id] if d['type'] == 'taglib'),
+            'ページディレクティブ数': directive_types['page'],
+            'インクルードディレクティブ数': directive_types['include'],
+            'タグライブラリディレクティブ数': directive_types['taglib'],
             '合計ディレクティブ数': len(self.directives[file_id]),
             
             # スクリプトレット
             'スクリプトレット数': len(self.scriptlets[file_id]),
-            'スクリプトレット行数': sum(s['lines'] for s in self.scriptlets[file_id]),
+            'スクリプトレット行数': scriptlet_lines,
             '式（Expression）数': len(self.expressions[file_id]),
             '宣言スクリプトレット数': len(self.declarations[file_id]),
             
             # タグ使用
             'JSTL合計タグ数': len(self.jstl_usage[file_id]),
-            'JSTLコアタグ数': sum(1 for j in self.jstl_usage[file_id] if j['library'] == 'core'),
-            'JSTL書式タグ数': sum(1 for j in self.jstl_usage[file_id] if j['library'] == 'fmt'),
+            'JSTLコアタグ数': jstl_libraries['core'],
+            'JSTL書式タグ数': jstl_libraries['fmt'],
             'カスタムタグ数': len(self.custom_tags[file_id]),
             
             # EL式
             'EL式合計': len(self.el_expressions[file_id]),
-            '標準EL式数': sum(1 for e in self.el_expressions[file_id] if e['type'] == 'standard'),
-            '遅延評価EL式数': sum(1 for e in self.el_expressions[file_id] if e['type'] == 'deferred'),
+            '標準EL式数': el_types['standard'],
+            '遅延評価EL式数': el_types['deferred'],
             
             # HTML要素
-            'HTML要素数': len(re.findall(r'<[a-zA-Z][^>]*>', content)),
+            'HTML要素数': len(_RE_HTML_TAG_B.findall(data)),
             'フォーム数': len(self.forms[file_id]),
             '入力要素数': sum(f['input_count'] + f['select_count'] + f['textarea_count'] for f in self.forms[file_id]),
             
             # JavaScript/CSS
-            'JavaScript ブロック数': len(re.findall(r'<script[^>]*>', content)),
-            'CSS ブロック数': len(re.findall(r'<style[^>]*>', content)),
+            'JavaScript ブロック数': len(_RE_SCRIPT_OPEN_B.findall(data)),
+            'CSS ブロック数': len(_RE_STYLE_OPEN_B.findall(data)),
             'CSSクラス数': len(self.css_classes[file_id]),
             
             # インクルード
             '合計インクルード数': len(self.includes[file_id]),
-            'インクルードディレクティブ数': sum(1 for i in self.includes[file_id] if i['type'] == 'directive'),
-            'インクルードアクション数': sum(1 for i in self.includes[file_id] if i['type'] == 'action'),
+            'インクルードディレクティブ数': include_types['directive'],
+            'インクルードアクション数': include_types['action'],
             
             # コメント
-            'HTMLコメント数': len(re.findall(r'<!--.*?-->', content, re.DOTALL)),
-            'JSPコメント数': len(re.findall(r'<%--.*?--%>', content, re.DOTALL)),
+            'HTMLコメント数': len(_RE_HTML_COMMENT_B.findall(data)),
+            'JSPコメント数': len(_RE_JSP_COMMENT_B.findall(data)),
             
             # 暗黙オブジェクト使用
             'セッション使用数': len(self.session_usage[file_id]),
@@ -775,15 +1407,14 @@ class UnifiedJSPAnalyzer:
             'セキュリティ問題合計': len(self.security_issues[file_id])
         }
         
-        # ASTベースのスクリプトレット複雑度を集計（存在すればより精緻）
-        ast_scriptlet_complexity = sum(s.get('complexity', 0) for s in self.scriptlets[file_id])
+        # ASTベースのスクリプトレット複雑度（存在すればより精緻）
         metrics['ASTスクリプトレット複雑度'] = ast_scriptlet_complexity
 
         # 循環的複雑度を計算（基本1 + AST複雑度）
         complexity = 1 + ast_scriptlet_complexity
 
         # JSTL条件タグも複雑度に加算
-        complexity += sum(1 for j in self.jstl_usage[file_id] if j['tag'] in ['if', 'when', 'choose', 'forEach'])
+        complexity += sum(jstl_tags[tag] for tag in ('if', 'when', 'choose', 'forEach'))
 
         metrics['循環的複雑度'] = complexity
 
@@ -804,17 +1435,16 @@ class UnifiedJSPAnalyzer:
 
         self.metrics[file_id] = metrics
 
-    def _detect_security_issues(self, content, file_id):
-        """セキュリティ問題を検出"""
-        # SQLインジェクション脆弱性
-        sql_injection_patterns = [
-            r'Statement\.execute\([^)]*\+',
-            r'executeQuery\([^)]*\+',
-            r'executeUpdate\([^)]*\+'
-        ]
-        
-        for pattern in sql_injection_patterns:
-            for match in re.finditer(pattern, content):
+    def _detect_security_issues(self, content, file_id, literals=None):
+        """セキュリティ問題を検出（literals は _find_literals の結果）"""
+        if literals is None:
+            literals = _find_literals(content)
+
+        # SQLインジェクション脆弱性（パターンに必要なキーワードが無ければ照合しない）
+        for literal, pattern in _SQLI_PATTERNS:
+            if literal not in literals:
+                continue
+            for match in pattern.finditer(content):
                 self.security_issues[file_id].append({
                     'type': 'sql_injection',
                     'pattern': match.group(0),
@@ -822,13 +1452,10 @@ class UnifiedJSPAnalyzer:
                 })
         
         # XSS脆弱性
-        xss_patterns = [
-            r'<%=\s*request\.getParameter\(["\'][^"\']*["\']',
-            r'out\.print\(\s*request\.getParameter'
-        ]
-        
-        for pattern in xss_patterns:
-            for match in re.finditer(pattern, content):
+        for literal, pattern in _XSS_PATTERNS:
+            if literal not in literals:
+                continue
+            for match in pattern.finditer(content):
                 self.security_issues[file_id].append({
                     'type': 'xss',
                     'pattern': match.group(0),
@@ -837,12 +1464,21 @@ class UnifiedJSPAnalyzer:
 
     def build_dependency_graph(self):
         """依存関係グラフを構築"""
+        # パス・basename の索引を一度だけ作り、参照先の解決を辞書引きで行う
+        self._build_path_indexes()
+        self._include_map = None
+
         # グラフにノードを追加
-        for file_id in self.jsp_files.keys():
-            self.dependency_graph.add_node(file_id)
+        self.dependency_graph.add_nodes_from(self.jsp_files.keys())
+
+        # 同じ (呼び出し元, 呼び出し先, 種別) の依存関係は最初の1件だけを記録する
+        # （エッジは検出順に溜めておき、最後にまとめてグラフへ追加する）
+        seen = set()
+        edges = []
         
         # インクルードによる依存関係
         for file_id, includes in self.includes.items():
+            caller_dir = os.path.dirname(self._norm_paths.get(file_id, ''))
             for include in includes:
                 if include['type'] == 'directive':
                     target = include.get('file', '')
@@ -866,77 +1502,37 @@ class UnifiedJSPAnalyzer:
                         })
                         continue
 
-                    # strip query params
-                    target_no_query = raw_target.split('?', 1)[0]
-
-                    # normalize separators
-                    normalized_target = os.path.normpath(target_no_query).replace('\\', '/')
-
-                    # build candidate paths to match against known files
-                    candidates = set()
-                    candidates.add(normalized_target)
-                    candidates.add(normalized_target.lstrip('/'))
-                    candidates.add(os.path.basename(normalized_target))
-
-                    # if relative path, resolve against caller directory
-                    caller_info = self.jsp_files.get(file_id, {})
-                    caller_path = caller_info.get('path', '')
-                    if caller_path and not normalized_target.startswith('/'):
-                        caller_dir = os.path.dirname(caller_path)
-                        resolved = os.path.normpath(os.path.join(caller_dir, normalized_target)).replace('\\', '/')
-                        candidates.add(resolved)
-
-                    matched = False
-                    for target_id, target_info in self.jsp_files.items():
-                        target_path = target_info.get('path', '')
-                        if not target_path:
-                            continue
-
-                        # normalized target path variants for comparison
-                        tpath_norm = target_path.replace('\\', '/')
-                        tpath_norm_strip = tpath_norm.lstrip('/')
-
-                        # check direct contains/endswith matches
-                        if any(tpath_norm.endswith(cand) or cand.endswith(tpath_norm) or tpath_norm_strip.endswith(cand) or os.path.basename(tpath_norm) == cand for cand in candidates):
-                            self.dependency_graph.add_edge(file_id, target_id)
-                            self.dependencies[file_id].append({
-                                'target': target_id,
-                                'type': include['type'],
-                                'raw': raw_target
-                            })
-                            matched = True
-                            break
+                    # strip query params and resolve against known files (memoized per caller directory)
+                    target_id, fallback_id = self._resolve_include_target(caller_dir, raw_target.split('?', 1)[0])
 
-                    if not matched:
-                        # no exact match found; try basename fallback search
-                        bt = os.path.basename(normalized_target)
-                        for target_id, target_info in self.jsp_files.items():
-                            if os.path.basename(target_info.get('path', '')) == bt:
-                                self.dependency_graph.add_edge(file_id, target_id)
-                                self.dependencies[file_id].append({
-                                    'target': target_id,
-                                    'type': include['type'],
-                                    'raw': raw_target,
-                                    'note': 'basename_fallback'
-                                })
-                                matched = True
-                                break
+                    if target_id:
+                        self._add_dependency(seen, edges, file_id, {
+                            'target': target_id,
+                            'type': include['type'],
+                            'raw': raw_target
+                        })
+                        continue
+
+                    # no path match found; fall back to the first file with the same basename
+                    if fallback_id:
+                        self._add_dependency(seen, edges, file_id, {
+                            'target': fallback_id,
+                            'type': include['type'],
+                            'raw': raw_target,
+                            'note': 'basename_fallback'
+                        })
         
         # フォームアクションによる依存関係
         for file_id, forms in self.forms.items():
             for form in forms:
                 action = form.get('action', '')
                 if action and not action.startswith(('javascript:', 'http:', 'https:')):
-                    normalized_action = os.path.normpath(action).replace('\\', '/')
-                    
-                    for target_id, target_info in self.jsp_files.items():
-                        if target_info['path'].endswith(normalized_action):
-                            self.dependency_graph.add_edge(file_id, target_id)
-                            self.dependencies[file_id].append({
-                                'target': target_id,
-                                'type': 'form_action'
-                            })
-                            break
+                    target_id = self._find_file_by_path(_normalize_ref_path(action))
+                    if target_id:
+                        self._add_dependency(seen, edges, file_id, {
+                            'target': target_id,
+                            'type': 'form_action'
+                        })
 
         # カスタムタグ使用による依存関係（タグファイル .tag/.tagx を推測してマッチ）
         for file_id, tags in self.custom_tags.items():
@@ -947,50 +1543,69 @@ class UnifiedJSPAnalyzer:
                 # try to resolve via helper _resolve_tag_file which consolidates multiple heuristics
                 target_id = self._resolve_tag_file(prefix, tagname, caller_file_id=file_id)
                 if target_id:
-                    self.dependency_graph.add_edge(file_id, target_id)
-                    self.dependencies[file_id].append({
+                    self._add_dependency(seen, edges, file_id, {
                         'target': target_id,
                         'type': 'custom_tag',
                         'tag_prefix': prefix,
                         'tag_name': tagname,
                         'raw': tag_usage.get('raw')
                     })
-                    continue
-                # if still not resolved, fallback to basename scan
-                candidates = [f"{tagname}.tag", f"{tagname}.tagx", tagname]
-                for target_id, target_info in self.jsp_files.items():
-                    tpath = target_info.get('path', '')
-                    if not tpath:
-                        continue
-                    base = os.path.basename(tpath)
-                    if base in candidates:
-                        self.dependency_graph.add_edge(file_id, target_id)
-                        self.dependencies[file_id].append({
-                            'target': target_id,
-                            'type': 'custom_tag_fallback',
-                            'tag_prefix': prefix,
-                            'tag_name': tagname,
-                            'raw': tag_usage.get('raw')
-                        })
-                        break
+
+        self.dependency_graph.add_edges_from(edges)
+
+    def _get_include_map(self):
+        """参照先ごとの呼び出し元集合を返す（依存関係から一度だけ作り、各レポートで共有する）"""
+        if self._include_map is None:
+            # (参照先, 呼び出し元) の組を並べ替えて参照先ごとにまとめ、参照先のハッシュは1つにつき1回で済ませる
+            pairs = sorted((dep['target'], caller_id)
+                           for caller_id, deps in self.dependencies.items()
+                           for dep in deps if dep.get('target'))
+            self._include_map = {target: {caller_id for _, caller_id in group}
+                                 for target, group in groupby(pairs, key=itemgetter(0))}
+        return self._include_map
+
+    def _get_path_of(self):
+        """file_id から表示用パスへの辞書を返す（レポートの各ループで jsp_files を二重に引かないよう一度だけ作る）"""
+        if self._path_of is None:
+            self._path_of = {file_id: info.get('path', file_id) for file_id, info in self.jsp_files.items()}
+        return self._path_of
+
+    def _add_dependency(self, seen, edges, file_id, dep):
+        """解決済みの依存関係を一覧とエッジ列に追加（seen にある組み合わせは追加しない）"""
+        key = (file_id, dep['target'], dep['type'])
+        if key in seen:
+            return
+        seen.add(key)
+        edges.append((file_id, dep['target']))
+        self.dependencies[file_id].append(dep)
 
     def calculate_coupling_metrics(self):
         """結合度メトリクスを計算"""
+        if HAS_SCIPY and self.dependency_graph.number_of_nodes() > 0:
+            self._calculate_coupling_metrics_sparse()
+            return
+
+        # 循環に含まれるノード = 2ノード以上の強連結成分に属するか、自己ループを持つノード
+        cyclic_nodes = set()
+        for component in nx.strongly_connected_components(self.dependency_graph):
+            if len(component) > 1:
+                cyclic_nodes.update(component)
+        cyclic_nodes.update(n for n, _ in nx.selfloop_edges(self.dependency_graph))
+
+        # 次数はグラフ全体で一度だけ辞書化しておく
+        in_degrees = dict(self.dependency_graph.in_degree())
+        out_degrees = dict(self.dependency_graph.out_degree())
+
         for node in self.dependency_graph.nodes():
-            in_degree = self.dependency_graph.in_degree(node)
-            out_degree = self.dependency_graph.out_degree(node)
+            in_degree = in_degrees[node]
+            out_degree = out_degrees[node]
             total_coupling = in_degree + out_degree
             
             # インスタビリティ
             instability = out_degree / total_coupling if total_coupling > 0 else 0
             
             # 循環的依存関係の検出
-            has_cyclic = False
-            try:
-                cycles = list(nx.simple_cycles(self.dependency_graph))
-                has_cyclic = any(node in cycle for cycle in cycles)
-            except:
-                pass
+            has_cyclic = node in cyclic_nodes
             
             self.coupling_metrics[node] = {
                 '流入結合度': in_degree,
@@ -1004,84 +1619,130 @@ class UnifiedJSPAnalyzer:
             if node in self.metrics:
                 self.metrics[node].update(self.coupling_metrics[node])
 
-    def _analyze_html_patterns(self):
-        """HTMLパターンを解析"""
-        if not HAS_BEAUTIFULSOUP:
-            return
-        
-        for file_id, file_info in self.jsp_files.items():
-            try:
-                content = self._read_file_content(file_info['full_path'])
-                if not content:
-                    continue
-                
-                # JSP要素を削除
-                clean_content = re.sub(r'<%.*?%>', '', content, flags=re.DOTALL)
-                clean_content = re.sub(r'\${[^}]+}', '', clean_content)
-                clean_content = re.sub(r'<[a-z]+:[^>]+/?>', '', clean_content)
-                
-                soup = BeautifulSoup(clean_content, 'html.parser')
-                
-                pattern_info = {
-                    'tables': len(soup.find_all('table')),
-                    'forms': len(soup.find_all('form')),
-                    'divs': len(soup.find_all('div')),
-                    'lists': len(soup.find_all(['ul', 'ol'])),
-                    'headers': len(soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])),
-                    'images': len(soup.find_all('img')),
-                    'links': len(soup.find_all('a'))
-                }
-                
-                self.html_patterns[file_id] = pattern_info
-                
-            except Exception as e:
-                self.log(f"警告: {file_id} のHTMLパターン解析中にエラー: {e}")
+    def _calculate_coupling_metrics_sparse(self):
+        """依存グラフを CSR 隣接行列に変換し、次数と循環依存を scipy でまとめて計算"""
+        nodes = list(self.dependency_graph.nodes())
+        adjacency = nx.to_scipy_sparse_array(self.dependency_graph, nodelist=nodes, format='csr')
+        # 行ごとの非ゼロ数が流出次数、列インデックスの出現数が流入次数
+        out_degrees = np.diff(adjacency.indptr)
+        in_degrees = np.bincount(adjacency.indices, minlength=len(nodes))
+
+        # 循環に含まれるノード = 2ノード以上の強連結成分に属するか、自己ループを持つノード
+        n_components, labels = csgraph.connected_components(adjacency, directed=True, connection='strong')
+        component_sizes = np.bincount(labels, minlength=n_components)
+        cyclic = (component_sizes[labels] > 1) | (adjacency.diagonal() != 0)
+
+        for i, node in enumerate(nodes):
+            in_degree = int(in_degrees[i])
+            out_degree = int(out_degrees[i])
+            total_coupling = in_degree + out_degree
 
-    def _analyze_java_patterns(self):
-        """Javaパターンを解析"""
-        for file_id, scriptlets in self.scriptlets.items():
-            if not scriptlets:
-                continue
-            
-            pattern_info = {
-                'loop_patterns': 0,
-                'condition_patterns': 0,
-                'db_patterns': 0,
-                'var_declaration_patterns': 0,
-                'complexity': 0
+            # インスタビリティ
+            instability = out_degree / total_coupling if total_coupling > 0 else 0
+
+            self.coupling_metrics[node] = {
+                '流入結合度': in_degree,
+                '流出結合度': out_degree,
+                '合計結合度': total_coupling,
+                'インスタビリティ': round(instability, 2),
+                '循環的依存関係': bool(cyclic[i])
             }
+
+            # メトリクスに追加
+            if node in self.metrics:
+                self.metrics[node].update(self.coupling_metrics[node])
+
+    def _analyze_html_patterns(self, content, file_id):
+        """HTMLパターンを解析
+
+        通常は開始タグを正規表現で数える。deep_html が指定された場合のみ DOM を構築して
+        数える（lxml があれば lxml、無ければ BeautifulSoup を使用）。
+        """
+        if not content:
+            return
+        
+        try:
+            # JSP要素を削除
+            clean_content = _RE_HTML_JSP_BLOCK.sub('', content)
+            clean_content = _RE_HTML_EL.sub('', clean_content)
+            clean_content = _RE_HTML_PREFIXED_TAG.sub('', clean_content)
             
-            combined_code = '\n'.join([s.get('code', '') for s in scriptlets])
-            
-            # ループパターン
-            pattern_info['loop_patterns'] = (
-                len(re.findall(r'\bfor\b', combined_code)) +
-                len(re.findall(r'\bwhile\b', combined_code)) +
-                len(re.findall(r'\bdo\b', combined_code))
-            )
-            
-            # 条件パターン
-            pattern_info['condition_patterns'] = (
-                len(re.findall(r'\bif\b', combined_code)) +
-                len(re.findall(r'\bswitch\b', combined_code))
-            )
-            
-            # DB操作パターン
-            pattern_info['db_patterns'] = (
-                len(re.findall(r'Connection\b', combined_code)) +
-                len(re.findall(r'Statement\b', combined_code)) +
-                len(re.findall(r'ResultSet\b', combined_code))
-            )
-            
-            # 変数宣言パターン
-            pattern_info['var_declaration_patterns'] = len(
-                re.findall(r'(?:int|String|boolean|long|double|float|List|Map|Set)\s+\w+', combined_code)
-            )
+            if self.deep_html and HAS_LXML:
+                pattern_info = self._count_html_patterns_lxml(clean_content)
+            elif self.deep_html and HAS_BEAUTIFULSOUP:
+                pattern_info = self._count_html_patterns_bs4(clean_content)
+            else:
+                pattern_info = self._count_html_patterns_regex(clean_content)
             
-            # 複雑さスコア
-            pattern_info['complexity'] = sum(s.get('complexity', 0) for s in scriptlets)
+            self.html_patterns[file_id] = pattern_info
             
-            self.java_patterns[file_id] = pattern_info
+        except Exception as e:
+            self.log(f"警告: {file_id} のHTMLパターン解析中にエラー: {e}")
+
+    def _count_html_patterns_regex(self, clean_content):
+        """開始タグを1回の走査で数える（コメントと<script>内は対象外）"""
+        counts = Counter(m.lower() for m in
+                         _RE_HTML_COUNT.findall(self._strip_comments_and_scripts(clean_content)))
+        return {
+            'tables': counts['table'],
+            'forms': counts['form'],
+            'divs': counts['div'],
+            'lists': counts['ul'] + counts['ol'],
+            'headers': sum(counts[f'h{i}'] for i in range(1, 7)),
+            'images': counts['img'],
+            'links': counts['a']
+        }
+
+    def _count_html_patterns_lxml(self, clean_content):
+        """lxml.html で DOM を構築し、XPath の count() で数える（--deep-html 指定時）"""
+        pattern_info = dict.fromkeys(('tables', 'forms', 'divs', 'lists', 'headers', 'images', 'links'), 0)
+        if not clean_content.strip():
+            return pattern_info
+        root = lxml.html.document_fromstring(clean_content)
+        for key, xpath in _HTML_PATTERN_XPATHS:
+            pattern_info[key] = int(root.xpath(xpath))
+        return pattern_info
+
+    def _count_html_patterns_bs4(self, clean_content):
+        """BeautifulSoup で DOM を構築して数える（--deep-html 指定時）"""
+        soup = BeautifulSoup(clean_content, 'html.parser')
+        return {
+            'tables': len(soup.find_all('table')),
+            'forms': len(soup.find_all('form')),
+            'divs': len(soup.find_all('div')),
+            'lists': len(soup.find_all(['ul', 'ol'])),
+            'headers': len(soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])),
+            'images': len(soup.find_all('img')),
+            'links': len(soup.find_all('a'))
+        }
+
+    def _analyze_java_patterns(self, file_id):
+        """Javaパターンを解析（抽出済みのスクリプトレットから）"""
+        scriptlets = self.scriptlets.get(file_id)
+        if not scriptlets:
+            return
+        
+        pattern_info = {
+            'loop_patterns': 0,
+            'condition_patterns': 0,
+            'db_patterns': 0,
+            'var_declaration_patterns': 0,
+            'complexity': 0
+        }
+        
+        combined_code = '\n'.join([s.get('code', '') for s in scriptlets])
+        
+        # ループ・条件・DB操作パターンは1回の走査で語ごとに数えて分類する
+        for (keyword, db_word), count in Counter(_RE_JAVA_KEYWORD.findall(combined_code)).items():
+            pattern_info[_JAVA_KEYWORD_CATEGORIES[keyword or db_word]] += count
+        
+        # 変数宣言パターン
+        pattern_info['var_declaration_patterns'] = len(_RE_JAVA_VAR_DECL.findall(combined_code))
+        
+        # 複雑さスコア
+        pattern_info['complexity'] = sum(s.get('complexity', 0) for s in scriptlets)
+        
+        self.java_patterns[file_id] = pattern_info
 
     def _identify_issue_patterns(self):
         """問題パターンを検出"""
@@ -1117,7 +1778,7 @@ class UnifiedJSPAnalyzer:
     def generate_csv_report(self, output_file):
         """CSV形式でレポートを生成"""
         if not self.metrics:
-            print("書き込むメトリクスがありません")
+            _print_line("書き込むメトリクスがありません")
             return
         
         # フィールド名を収集
@@ -1135,22 +1796,23 @@ class UnifiedJSPAnalyzer:
         fieldnames = [f for f in priority_fields if f in all_fields]
         fieldnames.extend(sorted(f for f in all_fields if f not in priority_fields))
         
-        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            # ensure each row includes cluster info if present
-            for m in self.metrics.values():
-                row = {k: m.get(k, '') for k in fieldnames}
-                writer.writerow(row)
+        # ensure each row includes cluster info if present
+        # (行ごとに辞書を作らず、フィールド順のリストとして書き出す)
+        rows = [[m.get(k, '') for k in fieldnames] for m in self.metrics.values()]
+        
+        with open(output_file, 'w', newline='', encoding='utf-8', buffering=self._REPORT_BUFFER_SIZE) as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(fieldnames)
+            writer.writerows(rows)
         
-        print(f"CSVレポートを {output_file} に保存しました")
+        _print_line(f"CSVレポートを {output_file} に保存しました")
 
     def compute_clusters_and_plot(self, output_dir):
         """複雑度（JSP複雑度指標）と行数で3x3のクラスタに分類しプロットを出力します。
         クラスタは行数と複雑度をそれぞれ tertile（3分位）でビニングして 3x3 の組合せで識別します。
         """
         if not self.metrics:
-            print('メトリクスが空のためクラスタリングをスキップします')
+            _print_line('メトリクスが空のためクラスタリングをスキップします')
             return
 
         x = []  # 行数
@@ -1168,71 +1830,71 @@ class UnifiedJSPAnalyzer:
         x_thresh = np.percentile(x, [33.33, 66.66]) if len(x) > 2 else (np.max(x), np.max(x))
         y_thresh = np.percentile(y, [33.33, 66.66]) if len(y) > 2 else (np.max(y), np.max(y))
 
-        clusters = {}
-        for i, file_id in enumerate(ids):
-            xi = x[i]
-            yi = y[i]
-            # それぞれ 0,1,2 のインデックスにマップ
-            cx = 0 if xi <= x_thresh[0] else (1 if xi <= x_thresh[1] else 2)
-            cy = 0 if yi <= y_thresh[0] else (1 if yi <= y_thresh[1] else 2)
-            cluster_id = cy * 3 + cx  # 0..8
-            clusters[file_id] = cluster_id
+        # それぞれ 0,1,2 のインデックスにまとめてマップ（閾値以下は下側のビン）
+        cx = np.searchsorted(x_thresh, x, side='left')
+        cy = np.searchsorted(y_thresh, y, side='left')
+        cluster_ids = cy * 3 + cx  # 0..8
+
+        # クラスタ種類（説明ラベル）。ソート可能な2桁接頭辞 (01..09) を付与
+        complexity_labels = ['低', '中', '高']
+        size_labels = ['小', '中', '大']
+        cluster_labels = [
+            f"{c + 1:02d} - {complexity_labels[c // 3]}複雑度・{size_labels[c % 3]}規模"
+            for c in range(9)
+        ]
+
+        for file_id, cluster_id in zip(ids, cluster_ids.tolist()):
             # メトリクスに追記
-            self.metrics[file_id]['クラスタ'] = int(cluster_id)
-            # クラスタ種類（説明ラベル）を追加
-            complexity_labels = ['低', '中', '高']
-            size_labels = ['小', '中', '大']
-            label_body = f"{complexity_labels[cy]}複雑度・{size_labels[cx]}規模"
-            # ソート可能な2桁接頭辞 (01..09) を付与
-            num_prefix = f"{int(cluster_id)+1:02d}"
-            cluster_label = f"{num_prefix} - {label_body}"
-            self.metrics[file_id]['クラスタ種類'] = cluster_label
+            self.metrics[file_id]['クラスタ'] = cluster_id
+            self.metrics[file_id]['クラスタ種類'] = cluster_labels[cluster_id]
 
         # プロット用データ（ゼロを避けるために +1 を用いる）
         x_pos = x + 1
         y_pos = y + 1
 
-        plt.figure(figsize=(8,6))
+        # pyplot の図管理を介さず Figure と Agg キャンバスを直接作る（スレッドからも描画できる）
+        fig = Figure(figsize=(8,6))
+        canvas = FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
 
         # hexbin による密度背景（対数ビン）
-        hb = plt.hexbin(x_pos, y_pos, gridsize=40, bins='log', cmap='Greys', mincnt=1)
-        cb = plt.colorbar(hb)
+        hb = ax.hexbin(x_pos, y_pos, gridsize=40, bins='log', cmap='Greys', mincnt=1)
+        cb = fig.colorbar(hb, ax=ax)
         cb.set_label('log10(count)')
 
         # クラスタ点を重ねる
         cmap = plt.get_cmap('tab10')
         colors = [cmap(i) for i in range(9)]
         for c in range(9):
-            idxs = [i for i, fid in enumerate(ids) if clusters[fid] == c]
-            if not idxs:
+            idxs = cluster_ids == c
+            if not idxs.any():
                 continue
-            plt.scatter(x_pos[idxs], y_pos[idxs], c=[colors[c]], s=30, alpha=0.9, label=f'Cluster {c}', edgecolors='none')
+            ax.scatter(x_pos[idxs], y_pos[idxs], c=[colors[c]], s=30, alpha=0.9, label=f'Cluster {c}', edgecolors='none')
 
-        plt.xscale('log')
-        plt.yscale('log')
-        plt.xlabel('Lines of code (log scale)')
-        plt.ylabel('JSP complexity score (log scale)')
-        plt.title('JSP: Lines vs Complexity (3x3 clusters)')
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel('Lines of code (log scale)')
+        ax.set_ylabel('JSP complexity score (log scale)')
+        ax.set_title('JSP: Lines vs Complexity (3x3 clusters)')
 
         # tertile のラインを描画（元のスケールに合わせて +1）
         for xt in x_thresh:
-            plt.axvline(xt+1, color='grey', linestyle='--', linewidth=0.8)
+            ax.axvline(xt+1, color='grey', linestyle='--', linewidth=0.8)
         for yt in y_thresh:
-            plt.axhline(yt+1, color='grey', linestyle='--', linewidth=0.8)
+            ax.axhline(yt+1, color='grey', linestyle='--', linewidth=0.8)
 
         # ラベルが無い場合の警告は無視
         try:
-            plt.legend(ncol=3, fontsize='small')
+            ax.legend(ncol=3, fontsize='small')
         except Exception:
             pass
 
         # 固定ファイル名で出力
         out_png = os.path.join(output_dir, 'jsp_clusters.png')
-        plt.tight_layout()
-        plt.savefig(out_png)
-        plt.close()
+        fig.tight_layout()
+        canvas.print_png(out_png)
 
-        print(f"Cluster plot saved to {out_png}")
+        _print_line(f"Cluster plot saved to {out_png}")
 
     def generate_markdown_report(self, output_file):
         """Markdown形式でレポートを生成"""
@@ -1247,24 +1909,18 @@ class UnifiedJSPAnalyzer:
             f.write('## サマリー統計\n\n')
             
             if self.metrics:
-                total_loc = sum(m.get('コード行数', 0) for m in self.metrics.values())
-                total_scriptlets = sum(m.get('スクリプトレット数', 0) for m in self.metrics.values())
-                total_jstl = sum(m.get('JSTL合計タグ数', 0) for m in self.metrics.values())
-                total_el = sum(m.get('EL式合計', 0) for m in self.metrics.values())
+                summary = self._get_summary()
                 
-                f.write(f'- **総コード行数**: {total_loc:,}\n')
-                f.write(f'- **総スクリプトレット数**: {total_scriptlets:,}\n')
-                f.write(f'- **総JSTLタグ数**: {total_jstl:,}\n')
-                f.write(f'- **総EL式数**: {total_el:,}\n\n')
+                f.write(f'- **総コード行数**: {summary["total_loc"]:,}\n')
+                f.write(f'- **総スクリプトレット数**: {summary["total_scriptlets"]:,}\n')
+                f.write(f'- **総JSTLタグ数**: {summary["total_jstl"]:,}\n')
+                f.write(f'- **総EL式数**: {summary["total_el"]:,}\n\n')
             
             # 問題の検出
             if self.issues:
                 f.write('## 検出された問題\n\n')
                 
-                issue_summary = defaultdict(int)
-                for issues in self.issues.values():
-                    for issue in issues:
-                        issue_summary[issue['type']] += 1
+                issue_summary = Counter(issue['type'] for issues in self.issues.values() for issue in issues)
                 
                 f.write('| 問題タイプ | 件数 |\n')
                 f.write('|-----------|------|\n')
@@ -1295,11 +1951,9 @@ class UnifiedJSPAnalyzer:
             if self.dependencies:
                 f.write('## ファイル依存関係\n\n')
                 
-                # 最も依存されているファイル
-                in_degrees = defaultdict(int)
-                for deps in self.dependencies.values():
-                    for dep in deps:
-                        in_degrees[dep['target']] += 1
+                # 最も依存されているファイル（動的インクルードなど参照先の無いものは除く）
+                in_degrees = Counter(dep['target'] for deps in self.dependencies.values()
+                                     for dep in deps if dep.get('target'))
                 
                 if in_degrees:
                     f.write('### 最も依存されているファイル（上位5件）\n\n')
@@ -1320,8 +1974,8 @@ class UnifiedJSPAnalyzer:
             if any(len(s) > 5 for s in self.scriptlets.values()):
                 recommendations.append('- スクリプトレットをJSTLやEL式、サーブレットに移行することを検討してください')
             
-            # セキュリティ問題がある場合
-            if self.security_issues:
+            # セキュリティ問題がある場合（空のエントリは数えない）
+            if any(self.security_issues.values()):
                 recommendations.append('- セキュリティ脆弱性が検出されました。SQLインジェクションとXSS対策を実施してください')
             
             # 循環的依存関係がある場合
@@ -1340,17 +1994,18 @@ class UnifiedJSPAnalyzer:
             
             f.write('\n')
         
-        print(f"Markdownレポートを {output_file} に保存しました")
+        _print_line(f"Markdownレポートを {output_file} に保存しました")
 
     def generate_json_report(self, output_file):
         """JSON形式でレポートを生成"""
+        summary = self._get_summary()
         report = {
             'project': os.path.basename(self.project_dir),
             'analysis_date': datetime.now().isoformat(),
             'summary': {
-                'total_files': len(self.jsp_files),
-                'total_loc': sum(m.get('コード行数', 0) for m in self.metrics.values()),
-                'total_issues': sum(len(issues) for issues in self.issues.values())
+                'total_files': summary['total_files'],
+                'total_loc': summary['total_loc'],
+                'total_issues': summary['total_issues']
             },
             'files': {},
             'dependency_graph': {
@@ -1368,40 +2023,47 @@ class UnifiedJSPAnalyzer:
                 'dependencies': self.dependencies.get(file_id, [])
             }
         
+        if HAS_ORJSON:
+            try:
+                # orjson は UTF-8 のバイト列を直接生成する（出力は json.dump と同じ整形）
+                data = orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            except TypeError:
+                pass  # orjson で扱えない値が含まれる場合は標準の json で出力
+            else:
+                with open(output_file, 'wb') as f:
+                    f.write(data)
+                _print_line(f"JSONレポートを {output_file} に保存しました")
+                return
+        
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(report, f, indent=2, ensure_ascii=False)
         
-        print(f"JSONレポートを {output_file} に保存しました")
+        _print_line(f"JSONレポートを {output_file} に保存しました")
 
     def generate_jsp_calls_csv(self, output_file):
         """JSP同士の呼び出し関係をCSVで出力"""
         # dependencies: { caller_file_id: [ { 'target': target_id, 'type': type }, ... ] }
+        path_of = self._get_path_of()
         rows = []
         for caller_id, deps in self.dependencies.items():
-            caller_path = self.jsp_files.get(caller_id, {}).get('path', caller_id)
+            caller_path = path_of.get(caller_id, caller_id)
             for dep in deps:
                 target_id = dep.get('target')
-                target_path = self.jsp_files.get(target_id, {}).get('path', target_id)
-                rows.append({
-                    'caller_id': caller_id,
-                    'caller_path': caller_path,
-                    'callee_id': target_id,
-                    'callee_path': target_path,
-                    'relation_type': dep.get('type')
-                })
+                target_path = path_of.get(target_id, target_id)
+                rows.append([caller_id, caller_path, target_id, target_path, dep.get('type')])
 
         # write CSV
-        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        with open(output_file, 'w', newline='', encoding='utf-8', buffering=self._REPORT_BUFFER_SIZE) as csvfile:
             fieldnames = ['caller_id', 'caller_path', 'callee_id', 'callee_path', 'relation_type']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for r in rows:
-                writer.writerow(r)
+            writer = csv.writer(csvfile)
+            writer.writerow(fieldnames)
+            writer.writerows(rows)
 
-        print(f"JSP呼び出し関係CSVを {output_file} に保存しました")
+        _print_line(f"JSP呼び出し関係CSVを {output_file} に保存しました")
 
     def generate_jsp_calls_markdown(self, output_file):
         """JSP同士の呼び出し関係をMarkdownで出力（呼び出し元ごとに一覧化）"""
+        path_of = self._get_path_of()
         callers = defaultdict(list)
         for caller_id, deps in self.dependencies.items():
             for dep in deps:
@@ -1414,223 +2076,221 @@ class UnifiedJSPAnalyzer:
 
             if not callers:
                 f.write('呼び出し関係は検出されませんでした。\n')
-                print(f"JSP呼び出し関係Markdownを {output_file} に保存しました")
+                _print_line(f"JSP呼び出し関係Markdownを {output_file} に保存しました")
                 return
 
             for caller_id, targets in sorted(callers.items()):
-                caller_path = self.jsp_files.get(caller_id, {}).get('path', caller_id)
+                caller_path = path_of.get(caller_id, caller_id)
                 f.write(f'## 呼び出し元: {caller_path}\n\n')
                 f.write('| 呼び出し先 | 種別 |\n')
                 f.write('|------------|------:|\n')
                 for target_id, rel_type in targets:
-                    target_path = self.jsp_files.get(target_id, {}).get('path', target_id)
+                    target_path = path_of.get(target_id, target_id)
                     f.write(f'| {target_path} | {rel_type} |\n')
                 f.write('\n')
 
-        print(f"JSP呼び出し関係Markdownを {output_file} に保存しました")
+        _print_line(f"JSP呼び出し関係Markdownを {output_file} に保存しました")
 
     def generate_include_usage_csv(self, output_file):
         """共通に使われるインクルードファイルと、それを利用するJSP一覧をCSVで出力"""
-        # build mapping: include_target_id -> set(caller_id)
-        include_map = defaultdict(set)
-        for caller_id, deps in self.dependencies.items():
-            for dep in deps:
-                target = dep.get('target')
-                if target:
-                    include_map[target].add(caller_id)
+        # mapping: include_target_id -> set(caller_id)
+        include_map = self._get_include_map()
+        path_of = self._get_path_of()
 
         rows = []
         for target_id, callers in include_map.items():
-            target_path = self.jsp_files.get(target_id, {}).get('path', target_id)
+            target_path = path_of.get(target_id, target_id)
             unique_callers = sorted(callers)
             usage_count = len(unique_callers)
             for caller in unique_callers:
-                caller_path = self.jsp_files.get(caller, {}).get('path', caller)
-                rows.append({
-                    'include_id': target_id,
-                    'include_path': target_path,
-                    'caller_id': caller,
-                    'caller_path': caller_path,
-                    'usage_count_for_include': usage_count
-                })
+                caller_path = path_of.get(caller, caller)
+                rows.append([target_id, target_path, caller, caller_path, usage_count])
 
-        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        with open(output_file, 'w', newline='', encoding='utf-8', buffering=self._REPORT_BUFFER_SIZE) as csvfile:
             fieldnames = ['include_id', 'include_path', 'caller_id', 'caller_path', 'usage_count_for_include']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for r in rows:
-                writer.writerow(r)
+            writer = csv.writer(csvfile)
+            writer.writerow(fieldnames)
+            writer.writerows(rows)
 
-        print(f"Include usage CSV saved to {output_file}")
+        _print_line(f"Include usage CSV saved to {output_file}")
 
     def generate_include_usage_markdown(self, output_file):
         """共通に使われるインクルードファイルと、それを利用するJSP一覧をMarkdownで出力"""
-        include_map = defaultdict(set)
-        for caller_id, deps in self.dependencies.items():
-            for dep in deps:
-                target = dep.get('target')
-                if target:
-                    include_map[target].add(caller_id)
+        include_map = self._get_include_map()
+        path_of = self._get_path_of()
 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write('# Include Usage Report\n\n')
-            f.write(f'Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}\n\n')
-
-            if not include_map:
-                f.write('No include relationships detected.\n')
-                print(f"Include usage Markdown saved to {output_file}")
-                return
+        # 断片をリストに溜め、最後に一度だけ書き出す
+        parts = ['# Include Usage Report\n\n',
+                 f'Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}\n\n']
 
-            # usage count の降順でソート
-            items = sorted(include_map.items(), key=lambda kv: len(kv[1]), reverse=True)
-            for target_id, callers in items:
-                target_path = self.jsp_files.get(target_id, {}).get('path', target_id)
-                unique_callers = sorted(callers)
-                f.write(f'## Include: {target_path} ({len(unique_callers)} usages)\n\n')
+        if not include_map:
+            parts.append('No include relationships detected.\n')
+        else:
+            # usage count の降順でソート（件数は先に一度だけ数え、呼び出し元は出力時に引く）
+            usage_counts = {target_id: len(callers) for target_id, callers in include_map.items()}
+            for target_id, usage_count in sorted(usage_counts.items(), key=itemgetter(1), reverse=True):
+                target_path = path_of.get(target_id, target_id)
+                unique_callers = sorted(include_map[target_id])
+                parts.append(f'## Include: {target_path} ({usage_count} usages)\n\n')
                 for c in unique_callers:
-                    caller_path = self.jsp_files.get(c, {}).get('path', c)
-                    f.write(f'- {caller_path}\n')
-                f.write('\n')
+                    caller_path = path_of.get(c, c)
+                    parts.append(f'- {caller_path}\n')
+                parts.append('\n')
 
-        print(f"Include usage Markdown saved to {output_file}")
+        with open(output_file, 'w', encoding='utf-8', buffering=self._REPORT_BUFFER_SIZE) as f:
+            f.write(''.join(parts))
+
+        _print_line(f"Include usage Markdown saved to {output_file}")
 
     def generate_include_graph(self, output_file, highlight_common=True):
         """インクルード関係を可視化する有向グラフ（PNG）を生成します。
         highlight_common=True の場合、header/footer/menu/common など共通部と思われるファイルを強調表示します。
         """
-        # include -> 呼び出し元集合 のマッピングを構築
-        include_map = defaultdict(set)
-        for caller_id, deps in self.dependencies.items():
-            for dep in deps:
-                target = dep.get('target')
-                if target:
-                    include_map[target].add(caller_id)
+        # include -> 呼び出し元集合 のマッピング
+        include_map = self._get_include_map()
+        path_of = self._get_path_of()
 
         if not include_map:
-            print('プロットするインクルード関係がありません')
+            _print_line('プロットするインクルード関係がありません')
             return
 
         G = nx.DiGraph()
-        # ノードとエッジを追加して可視化用グラフを作成
-        for include_id, callers in include_map.items():
-            include_path = self.jsp_files.get(include_id, {}).get('path', include_id)
-            G.add_node(include_path, type='include')
-            for caller in callers:
-                caller_path = self.jsp_files.get(caller, {}).get('path', caller)
-                G.add_node(caller_path, type='caller')
-                G.add_edge(caller_path, include_path)
-
-        # 共通ファイルとみなす判定
-        def is_common(p):
-            lp = p.lower()
-            return ('/common/' in lp) or any(k in lp for k in ['header', 'footer', 'menu', 'common'])
+        # ノードとエッジをまとめて追加して可視化用グラフを作成
+        # （include 先ノードを先に登録し、呼び出し元でもあるファイルは include として扱う）
+        G.add_nodes_from((path_of.get(include_id, include_id) for include_id in include_map), type='include')
+        G.add_edges_from((path_of.get(caller, caller), path_of.get(include_id, include_id))
+                         for include_id, callers in include_map.items() for caller in callers)
 
         # graphviz レイアウトを優先して可読性を確保（利用不可なら spring_layout にフォールバック）
-        try:
-            pos = None
+        # dot コマンドやバックエンドが無い場合は、一時ファイル経由の呼び出しを試みずに直接フォールバックする
+        pos = None
+        if HAS_GRAPHVIZ_DOT and HAS_PYDOT:
             try:
                 # networkx の pydot バックエンドを優先
                 pos = nx.nx_pydot.graphviz_layout(G, prog='dot')
-            except Exception:
+            except Exception as e:
+                self.log(f'pydot レイアウトエラー: {e}')
+        if pos is None and HAS_GRAPHVIZ_DOT and HAS_PYGRAPHVIZ:
+            try:
                 # pygraphviz が利用できる場合のフォールバック
-                try:
-                    pos = nx.nx_agraph.graphviz_layout(G, prog='dot')
-                except Exception:
-                    pos = None
-
-            if pos is None:
-                print('Graphviz レイアウトが利用できないため spring レイアウトにフォールバックします')
-                pos = nx.spring_layout(G, seed=42, k=0.5)
+                pos = nx.nx_agraph.graphviz_layout(G, prog='dot')
+            except Exception as e:
+                self.log(f'pygraphviz レイアウトエラー: {e}')
 
-        except Exception as e:
-            print(f'Graphviz レイアウトエラー: {e}. spring レイアウトを使用します')
+        if pos is None and HAS_SCIPY:
+            _print_line('Graphviz レイアウトが利用できないため疎行列版の力学レイアウトにフォールバックします')
+            pos = _sparse_fr_layout(G, seed=42)
+        elif pos is None:
+            _print_line('Graphviz レイアウトが利用できないため spring レイアウトにフォールバックします')
             pos = nx.spring_layout(G, seed=42, k=0.5)
 
-        node_colors = []
-        node_sizes = []
-        labels = {}
-        for n, d in G.nodes(data=True):
-            # 表示ラベルはファイル名（basename）
-            labels[n] = os.path.basename(n)
-            if d.get('type') == 'include':
-                if highlight_common and is_common(n):
-                    node_colors.append('orange')
-                    node_sizes.append(800)
-                else:
-                    node_colors.append('red')
-                    node_sizes.append(500)
-            else:
-                node_colors.append('skyblue')
-                node_sizes.append(300)
-
-        plt.figure(figsize=(12, 10))
-        nx.draw_networkx_nodes(G, pos, node_color=node_colors, node_size=node_sizes)
-        nx.draw_networkx_edges(G, pos, arrows=True, arrowstyle='->', arrowsize=10, edge_color='gray')
-        nx.draw_networkx_labels(G, pos, labels, font_size=8)
-
-        plt.title('Include Usage Graph')
-        plt.axis('off')
-        plt.tight_layout()
-        plt.savefig(output_file)
-        plt.close()
-
-        print(f'Include graph saved to {output_file}')
+        # ノードの種別・共通部判定を並列配列にまとめ、色とサイズは NumPy で一括に決める
+        paths = list(G.nodes())
+        is_include = np.array([t == 'include' for t in dict(G.nodes(data='type')).values()], dtype=bool)
+        is_common = np.array([bool(highlight_common and inc and _RE_COMMON_INCLUDE.search(p))
+                              for p, inc in zip(paths, is_include)], dtype=bool)
+        node_colors = np.where(is_include, np.where(is_common, 'orange', 'red'), 'skyblue')
+        node_sizes = np.where(is_include, np.where(is_common, 800, 500), 300)
+
+        # ノードは scatter 1つで描画する。エッジは小さなグラフでは向きが分かるよう矢印付きで描き、
+        # 大きなグラフでは LineCollection 1つにまとめてアーティスト数をグラフ規模に依存させない
+        # pyplot の図管理を介さず Figure と Agg キャンバスを直接作る（スレッドからも描画できる）
+        fig = Figure(figsize=(12, 10), dpi=self._GRAPH_DPI)
+        canvas = FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        if G.number_of_nodes() <= self._GRAPH_ARROW_NODE_LIMIT:
+            nx.draw_networkx_edges(G, pos, ax=ax, arrows=True, arrowstyle='-|>', arrowsize=10,
+                                   edge_color='gray', width=0.5, node_size=node_sizes.tolist())
+        else:
+            segments = [(pos[u], pos[v]) for u, v in G.edges()]
+            ax.add_collection(LineCollection(segments, colors='gray', linewidths=0.5, zorder=1))
+        xs, ys = np.array([pos[n] for n in paths], dtype=float).T
+        ax.scatter(xs, ys, c=node_colors, s=node_sizes, zorder=2)
+        # ラベルはノード1つにつき1アーティストになるため、大きなグラフでは省略する
+        if G.number_of_nodes() <= self._GRAPH_LABEL_NODE_LIMIT:
+            # 表示ラベルはファイル名（basename）。ノードは一意なので各パスにつき一度だけ計算される
+            labels = dict(zip(paths, map(os.path.basename, paths)))
+            nx.draw_networkx_labels(G, pos, labels, font_size=8, ax=ax)
+
+        ax.set_title('Include Usage Graph')
+        ax.axis('off')
+        if G.number_of_nodes() <= self._GRAPH_TIGHT_LAYOUT_NODE_LIMIT:
+            fig.tight_layout()
+        canvas.print_png(output_file)
+
+        _print_line(f'Include graph saved to {output_file}')
 
     def generate_summary_text(self, output_file):
         """テキスト形式のサマリーレポートを生成"""
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("="*60 + "\n")
-            f.write("JSPプロジェクト解析サマリー\n")
-            f.write("="*60 + "\n\n")
-            
-            f.write(f"プロジェクト: {os.path.basename(self.project_dir)}\n")
-            f.write(f"解析日時: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"解析ファイル数: {len(self.jsp_files)}\n\n")
-            
-            # 基本統計
-            if self.metrics:
-                f.write("【基本統計】\n")
-                f.write(f"総コード行数: {sum(m.get('コード行数', 0) for m in self.metrics.values()):,}\n")
-                f.write(f"平均コード行数: {sum(m.get('コード行数', 0) for m in self.metrics.values()) // len(self.metrics)}\n")
-                f.write(f"総スクリプトレット数: {sum(m.get('スクリプトレット数', 0) for m in self.metrics.values())}\n")
-                f.write(f"総JSTLタグ数: {sum(m.get('JSTL合計タグ数', 0) for m in self.metrics.values())}\n")
-                f.write(f"総EL式数: {sum(m.get('EL式合計', 0) for m in self.metrics.values())}\n\n")
-            
-            # 問題統計
-            if self.issues:
-                f.write("【検出された問題】\n")
-                issue_count = defaultdict(int)
-                for issues in self.issues.values():
-                    for issue in issues:
-                        issue_count[issue['type']] += 1
-                
-                for issue_type, count in sorted(issue_count.items(), key=lambda x: x[1], reverse=True):
-                    f.write(f"- {issue_type}: {count}件\n")
-                f.write("\n")
-            
-            # 使用率統計
-            if self.metrics:
-                files_with_scriptlets = sum(1 for m in self.metrics.values() if m.get('スクリプトレット数', 0) > 0)
-                files_with_jstl = sum(1 for m in self.metrics.values() if m.get('JSTL合計タグ数', 0) > 0)
-                files_with_el = sum(1 for m in self.metrics.values() if m.get('EL式合計', 0) > 0)
-                
-                f.write("【技術使用率】\n")
-                f.write(f"スクリプトレット使用率: {files_with_scriptlets / len(self.metrics) * 100:.1f}%\n")
-                f.write(f"JSTL使用率: {files_with_jstl / len(self.metrics) * 100:.1f}%\n")
-                f.write(f"EL式使用率: {files_with_el / len(self.metrics) * 100:.1f}%\n\n")
+        # 行を生成するジェネレータをそのまま大きなバッファ付きのファイルに流し込む
+        with open(output_file, 'w', encoding='utf-8', buffering=self._REPORT_BUFFER_SIZE) as f:
+            f.writelines(self._summary_lines())
+        
+        _print_line(f"サマリーレポートを {output_file} に保存しました")
+
+    def _summary_lines(self):
+        """テキストサマリーの各行を順に返す"""
+        yield "="*60 + "\n"
+        yield "JSPプロジェクト解析サマリー\n"
+        yield "="*60 + "\n\n"
+        
+        yield f"プロジェクト: {os.path.basename(self.project_dir)}\n"
+        yield f"解析日時: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        yield f"解析ファイル数: {len(self.jsp_files)}\n\n"
+        
+        # 基本統計
+        if self.metrics:
+            summary = self._get_summary()
+            yield "【基本統計】\n"
+            yield f"総コード行数: {summary['total_loc']:,}\n"
+            yield f"平均コード行数: {summary['total_loc'] // len(self.metrics)}\n"
+            yield f"総スクリプトレット数: {summary['total_scriptlets']}\n"
+            yield f"総JSTLタグ数: {summary['total_jstl']}\n"
+            yield f"総EL式数: {summary['total_el']}\n\n"
+        
+        # 問題統計
+        if self.issues:
+            yield "【検出された問題】\n"
+            issue_count = Counter(issue['type'] for issues in self.issues.values() for issue in issues)
             
-            # 改善推奨事項
-            f.write("【改善推奨事項】\n")
-            if any(len(s) > 5 for s in self.scriptlets.values()):
-                f.write("✓ スクリプトレットの削減を推奨\n")
-            if self.security_issues:
-                f.write("✓ セキュリティ脆弱性の修正が必要\n")
-            if any(f['size'] > 30000 for f in self.jsp_files.values()):
-                f.write("✓ 大きすぎるファイルの分割を推奨\n")
+            for issue_type, count in issue_count.most_common():
+                yield f"- {issue_type}: {count}件\n"
+            yield "\n"
+        
+        # 使用率統計
+        if self.metrics:
+            summary = self._get_summary()
             
-            f.write("\n" + "="*60 + "\n")
+            yield "【技術使用率】\n"
+            yield f"スクリプトレット使用率: {summary['files_with_scriptlets'] / len(self.metrics) * 100:.1f}%\n"
+            yield f"JSTL使用率: {summary['files_with_jstl'] / len(self.metrics) * 100:.1f}%\n"
+            yield f"EL式使用率: {summary['files_with_el'] / len(self.metrics) * 100:.1f}%\n\n"
         
-        print(f"サマリーレポートを {output_file} に保存しました")
+        # 改善推奨事項（スクリプトレット数とファイルサイズは1回の走査で判定し、両方見つかれば打ち切る）
+        many_scriptlets = large_file = False
+        for file_id, info in self.jsp_files.items():
+            if not many_scriptlets and len(self.scriptlets.get(file_id, ())) > 5:
+                many_scriptlets = True
+            if not large_file and info['size'] > 30000:
+                large_file = True
+            if many_scriptlets and large_file:
+                break
+
+        yield "【改善推奨事項】\n"
+        if many_scriptlets:
+            yield "✓ スクリプトレットの削減を推奨\n"
+        if any(self.security_issues.values()):
+            yield "✓ セキュリティ脆弱性の修正が必要\n"
+        if large_file:
+            yield "✓ 大きすぎるファイルの分割を推奨\n"
+        
+        yield "\n" + "="*60 + "\n"
+
+def _analyze_file_worker(file_path, stat, project_dir, verbose=False, deep_html=False):
+    """ワーカープロセスで単一ファイルを解析し、そのファイル分の抽出結果を返す"""
+    analyzer = UnifiedJSPAnalyzer(project_dir, verbose=verbose, jobs=1, deep_html=deep_html)
+    analyzer.analyze_file(file_path, stat)
+    return analyzer._file_results()
 
 
 def main():
@@ -1664,6 +2324,10 @@ def main():
                         help='出力ファイルのプレフィックス（デフォルト: jsp_analysis）')
     parser.add_argument('-v', '--verbose', action='store_true',
                         help='詳細なログを表示')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='ファイル解析の並列プロセス数（デフォルト: CPU数）')
+    parser.add_argument('--deep-html', action='store_true',
+                        help='HTMLパターンを BeautifulSoup で解析（デフォルトは正規表現で計数）')
     
     args = parser.parse_args()
     
@@ -1676,7 +2340,8 @@ def main():
     os.makedirs(args.output_dir, exist_ok=True)
     
     # 解析実行
-    analyzer = UnifiedJSPAnalyzer(args.project_dir, verbose=args.verbose)
+    analyzer = UnifiedJSPAnalyzer(args.project_dir, verbose=args.verbose,
+                                  jobs=args.jobs, deep_html=args.deep_html)
     analyzer.analyze_project()
     
     # レポート生成
@@ -1689,35 +2354,32 @@ def main():
     # クラスタ計算とプロット生成（CSVにクラスタを追記し、プロットをoutputに保存）
     analyzer.compute_clusters_and_plot(args.output_dir)
 
+    # レポートは互いに独立しているためスレッドで並行に書き出す
+    # （include グラフも pyplot を介さず描画するため、他のレポートと並行に生成できる）
+    report_jobs = []
     if 'csv' in formats:
-        csv_file = os.path.join(args.output_dir, f"{base_name}.csv")
-        analyzer.generate_csv_report(csv_file)
+        report_jobs.append((analyzer.generate_csv_report, f"{base_name}.csv"))
     # JSP呼び出し関係CSV
-    calls_csv = os.path.join(args.output_dir, f"{base_name}_jsp_calls.csv")
-    analyzer.generate_jsp_calls_csv(calls_csv)
+    report_jobs.append((analyzer.generate_jsp_calls_csv, f"{base_name}_jsp_calls.csv"))
     # include usage CSV/MD
-    include_csv = os.path.join(args.output_dir, f"{base_name}_include_usage.csv")
-    analyzer.generate_include_usage_csv(include_csv)
-    
+    report_jobs.append((analyzer.generate_include_usage_csv, f"{base_name}_include_usage.csv"))
     if 'markdown' in formats:
-        md_file = os.path.join(args.output_dir, f"{base_name}.md")
-        analyzer.generate_markdown_report(md_file)
+        report_jobs.append((analyzer.generate_markdown_report, f"{base_name}.md"))
     # JSP呼び出し関係Markdown
-    calls_md = os.path.join(args.output_dir, f"{base_name}_jsp_calls.md")
-    analyzer.generate_jsp_calls_markdown(calls_md)
-    include_md = os.path.join(args.output_dir, f"{base_name}_include_usage.md")
-    analyzer.generate_include_usage_markdown(include_md)
+    report_jobs.append((analyzer.generate_jsp_calls_markdown, f"{base_name}_jsp_calls.md"))
+    report_jobs.append((analyzer.generate_include_usage_markdown, f"{base_name}_include_usage.md"))
     # include usage graph
-    include_graph = os.path.join(args.output_dir, f"{base_name}_include_graph.png")
-    analyzer.generate_include_graph(include_graph)
-    
+    report_jobs.append((analyzer.generate_include_graph, f"{base_name}_include_graph.png"))
     if 'json' in formats:
-        json_file = os.path.join(args.output_dir, f"{base_name}.json")
-        analyzer.generate_json_report(json_file)
-    
+        report_jobs.append((analyzer.generate_json_report, f"{base_name}.json"))
     if 'text' in formats:
-        txt_file = os.path.join(args.output_dir, f"{base_name}_summary.txt")
-        analyzer.generate_summary_text(txt_file)
+        report_jobs.append((analyzer.generate_summary_text, f"{base_name}_summary.txt"))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(generate, os.path.join(args.output_dir, file_name))
+                   for generate, file_name in report_jobs]
+        for future in futures:
+            future.result()
     
     print("\n解析完了！")
     
@@ -1725,15 +2387,15 @@ def main():
     if analyzer.metrics:
         print(f"\n【解析結果サマリー】")
         print(f"総ファイル数: {len(analyzer.jsp_files)}")
-        print(f"総コード行数: {sum(m.get('コード行数', 0) for m in analyzer.metrics.values()):,}")
-        print(f"検出された問題: {sum(len(issues) for issues in analyzer.issues.values())}件")
+        summary = analyzer._get_summary()
+        print(f"総コード行数: {summary['total_loc']:,}")
+        print(f"検出された問題: {summary['total_issues']}件")
         
-        # 最も複雑なファイルを表示
-        most_complex = max(analyzer.metrics.items(), 
-                          key=lambda x: x[1].get('JSP複雑度指標', 0))
-        if most_complex:
-            file_name = os.path.basename(analyzer.jsp_files[most_complex[0]]['path'])
-            complexity = most_complex[1].get('JSP複雑度指標', 0)
+        # 最も複雑なファイルを表示（集計時に求めた値を使う）
+        most_complex_id = summary['most_complex_file']
+        if most_complex_id is not None:
+            file_name = os.path.basename(analyzer.jsp_files[most_complex_id]['path'])
+            complexity = summary['max_complexity']
             print(f"最も複雑なファイル: {file_name} (複雑度: {complexity:.2f})")
 
 
@@ -0,0 +1,232 @@
+import importlib.util
+import json
+import math
+import os
+import types
+
+import pytest
+
+_SPEC = importlib.util.spec_from_file_location(
+    'jsp_analyzer', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jsp-analyzer.py'))
+jsp_analyzer = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(jsp_analyzer)
+
+
+def _write(root, rel_path, text):
+    path = root / rel_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+    return path
+
+
+@pytest.mark.skipif(not jsp_analyzer.HAS_JAVALANG, reason='javalang is not installed')
+def test_scriptlet_ast_walk_descends_into_nested_lists():
+    # 匿名クラスの初期化子ブロックは ClassCreator.body の中で入れ子のリストになる
+    code = 'java.util.List<String> l = new java.util.ArrayList<String>() {{ if (a) add("x"); }};'
+    decisions, _, _, _ = jsp_analyzer._parse_scriptlet_complexity(code)
+    assert decisions == 1
+
+
+_FORM_IN_TABLE = (
+    '<table><form action="/save" method="POST"><tr><td>'
+    '<input name="a"> <select name="b"></select> <textarea name="c"></textarea>'
+    '</td></tr></form></table>'
+)
+
+
+@pytest.mark.parametrize('available, parse_name', [
+    ('HAS_LXML', '_parse_forms_lxml'),
+    ('HAS_BEAUTIFULSOUP', '_parse_forms_bs4'),
+])
+def test_form_parsers_do_not_undercount_form_inside_table(tmp_path, available, parse_name):
+    if not getattr(jsp_analyzer, available):
+        pytest.skip(f'{available} is False')
+    analyzer = jsp_analyzer.UnifiedJSPAnalyzer(str(tmp_path))
+    forms = getattr(analyzer, parse_name)(_FORM_IN_TABLE)
+    assert [(f['input_count'], f['select_count'], f['textarea_count']) for f in forms] == [(1, 1, 1)]
+
+
+def test_extract_forms_counts_form_inside_table(tmp_path):
+    analyzer = jsp_analyzer.UnifiedJSPAnalyzer(str(tmp_path))
+    analyzer._extract_forms(_FORM_IN_TABLE, 'page_jsp')
+    form, = analyzer.forms['page_jsp']
+    assert (form['action'], form['method']) == ('/save', 'post')
+    assert (form['input_count'], form['select_count'], form['textarea_count']) == (1, 1, 1)
+
+
+def test_extract_forms_without_lxml_falls_back_for_form_inside_table(tmp_path, monkeypatch):
+    monkeypatch.setattr(jsp_analyzer, 'HAS_LXML', False)
+    analyzer = jsp_analyzer.UnifiedJSPAnalyzer(str(tmp_path))
+    analyzer._extract_forms(_FORM_IN_TABLE, 'page_jsp')
+    form, = analyzer.forms['page_jsp']
+    assert (form['input_count'], form['select_count'], form['textarea_count']) == (1, 1, 1)
+
+
+def _analyze(root):
+    analyzer = jsp_analyzer.UnifiedJSPAnalyzer(str(root), jobs=1)
+    analyzer.analyze_project()
+    return analyzer
+
+
+@pytest.mark.parametrize('body, expected', [
+    ('<p><%= request.getParameter("q") %></p>\n', True),
+    ('<p>${fn:escapeXml(param.q)}</p>\n', False),
+])
+def test_security_recommendation_only_when_issues_found(tmp_path, body, expected):
+    _write(tmp_path / 'src', 'page.jsp', body)
+    analyzer = _analyze(tmp_path / 'src')
+
+    assert bool(analyzer.security_issues) is expected
+    analyzer.generate_summary_text(str(tmp_path / 'summary.txt'))
+    analyzer.generate_markdown_report(str(tmp_path / 'report.md'))
+    summary = (tmp_path / 'summary.txt').read_text(encoding='utf-8')
+    report = (tmp_path / 'report.md').read_text(encoding='utf-8')
+    assert ('セキュリティ脆弱性の修正が必要' in summary) is expected
+    assert ('セキュリティ脆弱性が検出されました' in report) is expected
+
+
+def test_scan_files_order_and_filters(tmp_path):
+    root = tmp_path / 'src'
+    for rel in ('index.jsp', 'b.tag', 'z.jspf', 'a/x.jsp', 'a/sub/y.jspf', 'WEB-INF/tags/t.tag',
+                'WEB-INF/build/keep.jsp', 'build/skip.jsp', '.hidden/h.jsp', '.dot.jsp', 'notes.txt'):
+        _write(root, rel, '<p>x</p>\n')
+    _write(tmp_path, 'outside/o.jsp', '<p>x</p>\n')
+    os.symlink(tmp_path / 'outside', root / 'zlink')
+    # 祖先へのリンク（循環）は辿らない
+    os.symlink(root, root / 'a' / 'loop')
+
+    analyzer = jsp_analyzer.UnifiedJSPAnalyzer(str(root))
+    files = [os.path.relpath(f, root).replace(os.sep, '/') for f in analyzer.scan_files()]
+
+    # 拡張子ごと（glob のパターン順）にまとめ、各拡張子の中は名前順の行きがけ順
+    assert files == [
+        'index.jsp', 'WEB-INF/build/keep.jsp', 'a/x.jsp', 'zlink/o.jsp',
+        'z.jspf', 'a/sub/y.jspf',
+        'b.tag', 'WEB-INF/tags/t.tag',
+    ]
+    assert analyzer.scan_files() == analyzer.scan_files()
+
+
+def test_file_size_and_mtime_come_from_scan_stat(tmp_path):
+    root = tmp_path / 'src'
+    _write(root, 'a.jsp', '<p>a</p>\n')
+    _write(root, 'sub/b.jspf', '<p>bb</p>\n' * 10)
+    analyzer = _analyze(root)
+
+    assert [info['full_path'] for info in analyzer.jsp_files.values()] == analyzer.scan_files()
+    for info in analyzer.jsp_files.values():
+        st = os.stat(info['full_path'])
+        assert info['size'] == st.st_size
+        assert info['last_modified'] == jsp_analyzer.datetime.fromtimestamp(st.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def test_duplicate_include_is_recorded_once_per_type(tmp_path):
+    root = tmp_path / 'src'
+    _write(root, 'common/header.jsp', '<div>header</div>\n')
+    _write(root, 'a.jsp', (
+        '<%@ include file="/common/header.jsp" %>\n'
+        '<%@ include file="/common/header.jsp" %>\n'
+        '<jsp:include page="/common/header.jsp"/>\n'
+    ))
+    _write(root, 'b.jsp', '<%@ include file="/common/header.jsp" %>\n')
+    analyzer = _analyze(root)
+
+    header_id, a_id, b_id = 'common/header_jsp', 'a_jsp', 'b_jsp'
+    # 同じ (呼び出し元, 参照先, 種別) は1件だけ。種別が異なる参照は別件として残す
+    assert sorted((d['target'], d['type']) for d in analyzer.dependencies[a_id]) == [
+        (header_id, 'action'), (header_id, 'directive')]
+    assert len(analyzer.dependencies[b_id]) == 1
+    assert analyzer.metrics[header_id]['流入結合度'] == 2
+    assert analyzer.metrics[a_id]['流出結合度'] == 1
+
+    analyzer.generate_markdown_report(str(tmp_path / 'report.md'))
+    report = (tmp_path / 'report.md').read_text(encoding='utf-8')
+    assert '- header.jsp: 3件の依存\n' in report
+
+    analyzer.generate_json_report(str(tmp_path / 'report.json'))
+    data = json.loads((tmp_path / 'report.json').read_text(encoding='utf-8'))
+    assert len(data['files'][a_id]['dependencies']) == 2
+
+
+def test_el_implicit_objects_are_recorded_with_operation(tmp_path):
+    analyzer = jsp_analyzer.UnifiedJSPAnalyzer(str(tmp_path))
+    analyzer._extract_all('<p>${param.id} ${sessionScope.user} ${bean.name}</p>', 'page_jsp')
+
+    assert [(u['attribute'], u['operation']) for u in analyzer.request_usage['page_jsp']] == [('id', 'parameter')]
+    assert [(u['attribute'], u['operation']) for u in analyzer.session_usage['page_jsp']] == [('user', 'get')]
+    assert [e['expression'] for e in analyzer.el_expressions['page_jsp']] == ['param.id', 'sessionScope.user', 'bean.name']
+
+
+def test_include_resolution_prefers_caller_relative_then_project_path(tmp_path):
+    root = tmp_path / 'src'
+    _write(root, 'pages/parts/nav.jsp', '<nav></nav>\n')
+    _write(root, 'other/parts/nav.jsp', '<nav></nav>\n')
+    _write(root, 'common/header.jsp', '<div></div>\n')
+    _write(root, 'legacy/common/header.jsp', '<div></div>\n')
+    _write(root, 'pages/index.jsp', (
+        '<%@ include file="parts/nav.jsp" %>\n'
+        '<jsp:include page="/common/header.jsp?x=1"/>\n'
+        '<jsp:include page="${dynamicPage}"/>\n'
+    ))
+    analyzer = _analyze(root)
+
+    deps = analyzer.dependencies['pages/index_jsp']
+    assert [d['target'] for d in deps if d['target']] == ['pages/parts/nav_jsp', 'common/header_jsp']
+    assert {d['raw'] for d in deps if d.get('dynamic')} == {'${dynamicPage}'}
+
+
+def test_custom_tag_resolves_to_webinf_tag_file_first(tmp_path):
+    root = tmp_path / 'src'
+    _write(root, 'a/widget.tag', '<%@ tag body-content="empty" %>\n')
+    _write(root, 'webapp/WEB-INF/tags/widget.tag', '<%@ tag body-content="empty" %>\n')
+    _write(root, 'webapp/index.jsp', (
+        '<%@ taglib prefix="my" tagdir="/WEB-INF/tags" %>\n'
+        '<my:widget/>\n'
+    ))
+    analyzer = _analyze(root)
+
+    targets = [d['target'] for d in analyzer.dependencies['webapp/index_jsp'] if d.get('target')]
+    assert targets == ['webapp/WEB-INF/tags/widget_tag']
+
+
+@pytest.mark.skipif(not jsp_analyzer.HAS_SCIPY, reason='scipy is not installed')
+@pytest.mark.parametrize('edges', [[], [('a', 'a'), ('b', 'b')]])
+def test_sparse_layout_handles_graph_without_edges_between_nodes(edges):
+    G = jsp_analyzer.nx.DiGraph()
+    G.add_nodes_from(['a', 'b', 'c'])
+    G.add_edges_from(edges)
+    pos = jsp_analyzer._sparse_fr_layout(G)
+    assert set(pos) == {'a', 'b', 'c'}
+    assert all(len(p) == 2 and all(map(math.isfinite, p)) for p in pos.values())
+
+
+@pytest.mark.parametrize('arrow_limit', [500, 0])
+def test_include_graph_with_only_self_includes(tmp_path, monkeypatch, arrow_limit):
+    # 上限以下は矢印付きのエッジ、上限を超えると LineCollection で描画する
+    monkeypatch.setattr(jsp_analyzer.UnifiedJSPAnalyzer, '_GRAPH_ARROW_NODE_LIMIT', arrow_limit)
+    root = tmp_path / 'src'
+    _write(root, 'a.jsp', '<%@ include file="a.jsp" %>\n')
+    _write(root, 'b.jsp', '<%@ include file="b.jsp" %>\n')
+    analyzer = _analyze(root)
+    analyzer.generate_include_graph(str(tmp_path / 'graph.png'))
+    assert (tmp_path / 'graph.png').stat().st_size > 0
+
+
+def test_scan_prefilter_falls_back_for_re2_without_set(monkeypatch):
+    # fb-re2 / pyre2 のように Set を持たない re2 モジュール
+    monkeypatch.setattr(jsp_analyzer, 'HAS_HYPERSCAN', False)
+    monkeypatch.setattr(jsp_analyzer, 'HAS_RE2', True)
+    monkeypatch.setattr(jsp_analyzer, 're2', types.ModuleType('re2'), raising=False)
+    assert jsp_analyzer._build_scan_prefilter() is None
+
+
+def test_js_function_calls_are_whole_names_and_scan_long_words_linearly(tmp_path):
+    analyzer = jsp_analyzer.UnifiedJSPAnalyzer(str(tmp_path))
+    analyzer._extract_frontend_elements(
+        '<script>function init() { if (ok) alert(getName(x)); return doIt (1); }</script>', 'page_jsp')
+    assert analyzer.js_function_defs['page_jsp'] == {'init'}
+    assert analyzer.js_function_calls['page_jsp'] == {'init', 'alert', 'getName', 'doIt'}
+
+    # 括弧の閉じない長い識別子の連続（以前のパターンでは数秒かかった）
+    names = [m.group(1) for m in jsp_analyzer._RE_JS_FUNCTION_CALL.finditer('a' * 20000 + ' (')]
+    assert names == ['a' * 20000]